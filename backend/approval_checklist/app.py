@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import os
+
 from fastapi import FastAPI
 
+# FastAPI already builds the OpenAPI schema lazily on the first /openapi.json
+# request. HDMS_DISABLE_DOCS=1 removes the docs routes altogether for
+# deployments that only need the health checks.
+DISABLE_DOCS = os.getenv("HDMS_DISABLE_DOCS", "").strip().lower() in {"1", "true", "yes"}
+
 app = FastAPI(
     title="HDMS Approval Checklist API",
-    docs_url="/approval/docs",
-    openapi_url="/approval/openapi.json",
+    docs_url=None if DISABLE_DOCS else "/approval/docs",
+    redoc_url=None if DISABLE_DOCS else "/redoc",
+    openapi_url=None if DISABLE_DOCS else "/approval/openapi.json",
 )
 
 
@@ -8,6 +8,9 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from core import config
 from core.database.manager import db_manager
+from rag.embedder import reset_embedding_service
+from rag.reranker import close_http_client as close_rerank_client
+from rag.service import close_http_client as close_llm_client
 from routes.qa import router as qa_router
 
 logger = logging.getLogger(__name__)
@@ -43,6 +46,9 @@ async def shutdown_event():
     """Close database connections on shutdown."""
     logger.info("Closing database connections...")
     db_manager.cleanup()
+    reset_embedding_service()
+    close_rerank_client()
+    close_llm_client()
     logger.info("Database connections closed")
 
 
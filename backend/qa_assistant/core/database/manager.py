@@ -49,7 +49,8 @@ class DatabaseManager:
             logger.info("Initializing MongoDB connection...")
             self.mongodb = MongoDBClient(
                 uri=config.MONGODB_URI,
-                database=config.MONGODB_DATABASE
+                database=config.MONGODB_DATABASE,
+                min_pool_size=config.MONGODB_MIN_POOL_SIZE
             )
             self.mongodb.connect()
 
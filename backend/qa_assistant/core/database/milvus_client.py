@@ -2,12 +2,25 @@
 Milvus vector database client for HDMS.
 """
 
-from pymilvus import connections, Collection, FieldSchema, CollectionSchema, DataType, utility
+from pymilvus import connections, Collection, FieldSchema, CollectionSchema, DataType, MilvusException, utility
 from typing import List, Dict, Any, Optional
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Milvus error codes for a collection that is gone or no longer loaded
+_STALE_COLLECTION_CODES = frozenset({100, 101})
+_STALE_COLLECTION_MARKERS = ("not loaded", "not found", "released", "can't find collection")
+
+
+def _is_stale_collection_error(exc: MilvusException) -> bool:
+    """True if *exc* means the cached collection handle must be reloaded."""
+    if getattr(exc, "code", None) in _STALE_COLLECTION_CODES:
+        return True
+    message = str(getattr(exc, "message", exc)).lower()
+    return any(marker in message for marker in _STALE_COLLECTION_MARKERS)
+
 
 class MilvusClient:
     """Client for interacting with Milvus vector database."""
@@ -24,6 +37,10 @@ class MilvusClient:
         self.port = port
         self.connection_alias = "default"
         self._connected = False
+        # Collections loaded for search, reused across requests: building a
+        # Collection and calling load() are server round-trips each time
+        self._loaded: Dict[str, Collection] = {}
+        self._load_lock = threading.Lock()
 
     def connect(self) -> None:
         """Establish connection to Milvus server."""
@@ -42,6 +59,7 @@ class MilvusClient:
     def disconnect(self) -> None:
         """Disconnect from Milvus server."""
         if self._connected:
+            self._loaded.clear()
             connections.disconnect(alias=self.connection_alias)
             self._connected = False
             logger.info("Disconnected from Milvus")
@@ -206,6 +224,18 @@ class MilvusClient:
         expr = f"doc_id in [{quoted}]"
         return self.delete_by_expr(collection_name, expr)
 
+    def _get_loaded_collection(self, collection_name: str) -> Collection:
+        """Return a loaded handle for *collection_name*, loading it on first use."""
+        collection = self._loaded.get(collection_name)
+        if collection is None:
+            with self._load_lock:
+                collection = self._loaded.get(collection_name)
+                if collection is None:
+                    collection = Collection(collection_name)
+                    collection.load()
+                    self._loaded[collection_name] = collection
+        return collection
+
     def search(
         self,
         collection_name: str,
@@ -218,22 +248,18 @@ class MilvusClient:
 
         Args:
             collection_name: Name of the collection
-            query_vector: Query embedding vector
+            query_vector: Query embedding vector (list or float32 array)
             top_k: Number of results to return
             filter_expr: Optional filter expression
 
         Returns:
             List of search results with id, text, doc_id, chunk_index, metadata, and distance
         """
-        collection = Collection(collection_name)
-        collection.load()
-
         search_params = {
             "metric_type": "COSINE",
             "params": {"nprobe": 10}
         }
-
-        results = collection.search(
+        search_kwargs = dict(
             data=[query_vector],
             anns_field="embedding",
             param=search_params,
@@ -242,6 +268,19 @@ class MilvusClient:
             output_fields=["id", "text", "doc_id", "chunk_index", "metadata"]
         )
 
+        try:
+            results = self._get_loaded_collection(collection_name).search(**search_kwargs)
+        except MilvusException as exc:
+            if not _is_stale_collection_error(exc):
+                raise
+            # Released or recreated elsewhere (e.g. by re-ingestion): reload once
+            logger.warning(f"Search on '{collection_name}' failed, reloading collection: {exc}")
+            self._loaded.pop(collection_name, None)
+            try:
+                results = self._get_loaded_collection(collection_name).search(**search_kwargs)
+            except Exception as retry_exc:
+                raise retry_exc from exc
+
         # Format results
         formatted_results = []
         for hits in results:
@@ -265,6 +304,7 @@ class MilvusClient:
         Args:
             collection_name: Name of the collection to delete
         """
+        self._loaded.pop(collection_name, None)
         if utility.has_collection(collection_name):
             utility.drop_collection(collection_name)
             logger.info(f"Deleted collection {collection_name}")
@@ -13,23 +13,31 @@ logger = logging.getLogger(__name__)
 class MongoDBClient:
     """Client for interacting with MongoDB document database."""
 
-    def __init__(self, uri: str, database: str):
+    def __init__(self, uri: str, database: str, min_pool_size: int = 0):
         """
         Initialize MongoDB client.
 
         Args:
             uri: MongoDB connection URI
             database: Database name
+            min_pool_size: Authenticated connections the pool keeps open
+                while idle, so a request after a quiet spell does not pay
+                the TCP + auth handshake
         """
         self.uri = uri
         self.database_name = database
+        self.min_pool_size = min_pool_size
         self.client: Optional[MongoClient] = None
         self.db = None
 
     def connect(self) -> None:
         """Establish connection to MongoDB server."""
         try:
-            self.client = MongoClient(self.uri, serverSelectionTimeoutMS=5000)
+            self.client = MongoClient(
+                self.uri,
+                serverSelectionTimeoutMS=5000,
+                minPoolSize=self.min_pool_size,
+            )
             # Test connection
             self.client.admin.command('ping')
             self.db = self.client[self.database_name]
@@ -220,7 +228,8 @@ class MongoDBClient:
         self,
         collection: str,
         query: str,
-        limit: int = 10
+        limit: int = 10,
+        projection: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
         """
         Perform full-text search.
@@ -229,12 +238,14 @@ class MongoDBClient:
             collection: Collection name
             query: Search query string
             limit: Maximum number of results
+            projection: Fields to include (all fields when None); the text
+                score is always returned as "score"
 
         Returns:
             List of matching documents
         """
         cursor = self.db[collection].find(
             {"$text": {"$search": query}},
-            {"score": {"$meta": "textScore"}}
+            {**(projection or {}), "score": {"$meta": "textScore"}}
         ).sort([("score", {"$meta": "textScore"})]).limit(limit)
         return list(cursor)
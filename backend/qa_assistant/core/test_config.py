@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from core import config
+
+
+class LoadEnvFileTests(unittest.TestCase):
+    def load(self, content: str, environ=None) -> dict:
+        with tempfile.TemporaryDirectory() as tmp:
+            env_path = Path(tmp) / ".env"
+            env_path.write_bytes(content.encode("utf-8"))
+            with mock.patch.object(config, "_find_env_file", return_value=env_path), \
+                    mock.patch.dict(os.environ, environ or {}, clear=True):
+                config._load_env_file()
+                return dict(os.environ)
+
+    def test_plain_assignments(self):
+        env = self.load("A=1\n  B = two words  \nC=\n")
+
+        self.assertEqual(env, {"A": "1", "B": "two words", "C": ""})
+
+    def test_blank_comment_and_bare_lines_are_skipped(self):
+        env = self.load("\n# A=1\n   # B=2\nNOT_AN_ASSIGNMENT\n=orphan\nC=3\n")
+
+        self.assertEqual(env, {"C": "3"})
+
+    def test_first_equals_splits_and_hash_stays_in_value(self):
+        env = self.load("URL=mongodb://u:p#1@h/db?a=b\n")
+
+        self.assertEqual(env, {"URL": "mongodb://u:p#1@h/db?a=b"})
+
+    def test_export_prefix_is_part_of_the_key(self):
+        env = self.load("export KEY=value\n")
+
+        self.assertEqual(env, {"export KEY": "value"})
+
+    def test_hyphenated_key(self):
+        env = self.load("MY-KEY=value\n")
+
+        self.assertEqual(env, {"MY-KEY": "value"})
+
+    def test_quoted_value_with_trailing_comment_keeps_the_comment(self):
+        env = self.load('KEY="v" # comment\n')
+
+        self.assertEqual(env, {"KEY": 'v" # comment'})
+
+    def test_unterminated_quote_is_stripped(self):
+        env = self.load("A=\"open\nB='open\n")
+
+        self.assertEqual(env, {"A": "open", "B": "open"})
+
+    def test_padded_quoted_value_is_trimmed_inside_the_quotes(self):
+        env = self.load('A=" padded "\nB=\'"mixed"\'\n')
+
+        self.assertEqual(env, {"A": "padded", "B": "mixed"})
+
+    def test_crlf_and_lone_cr_line_endings(self):
+        env = self.load("A=1\r\nB=2\rC=3")
+
+        self.assertEqual(env, {"A": "1", "B": "2", "C": "3"})
+
+    def test_existing_variables_and_first_assignment_win(self):
+        env = self.load("A=file\nB=first\nB=second\n", environ={"A": "process"})
+
+        self.assertEqual(env, {"A": "process", "B": "first"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,76 +1,138 @@
 """
-In-memory query result cache with TTL for the RAG pipeline.
-Caches complete retrieval results + generated answers.
+Caches for the RAG pipeline.
+
+- QueryCache: in-memory TTL cache for complete retrieval results + generated answers
+  (also reused for graph lookups and rerank orderings).
+- ScorerCache: on-disk (SQLite) cache of rerank scores per (query, passage).
+- EmbeddingCache: on-disk (SQLite) cache of query embeddings, shared by workers.
 """
 
 import hashlib
+import random
+import sqlite3
 import time
 import threading
 import logging
-from collections import OrderedDict
-from typing import Any, Optional
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 
 
+class _Slot:
+    """A single CLOCK slot; replaced wholesale on write so readers never see a torn entry."""
+
+    __slots__ = ("key", "value", "timestamp", "referenced")
+
+    def __init__(self, key: bytes, value: dict, timestamp: float):
+        self.key = key
+        self.value = value
+        self.timestamp = timestamp
+        self.referenced = False
+
+
 class QueryCache:
     """
-    Thread-safe LRU cache with TTL for query results.
+    Thread-safe CLOCK cache with TTL for query results.
 
-    Cache key: SHA-256 of normalized query text (strip + lowercase).
+    Cache key: 8-byte BLAKE2b digest of normalized query text (strip + lowercase).
     History is NOT part of the key -- same question yields same retrieval.
+
+    Hits are lock-free: they only set the slot's ``referenced`` bit. Writes take
+    the lock and sweep the clock hand, giving referenced slots a second chance
+    before eviction. Hit/miss counters are updated without the lock and may be
+    slightly off under heavy concurrency.
+
+    Once the cache is full, a new key is admitted only with probability
+    ``admission_probability`` (q-LRU). 1.0 admits every key; lower values keep
+    one-off queries from churning out entries that are being reused.
     """
 
-    def __init__(self, max_size: int = 128, ttl_seconds: int = 3600):
-        self._cache: OrderedDict[str, dict] = OrderedDict()
-        self._max_size = max_size
+    def __init__(
+        self,
+        max_size: int = 128,
+        ttl_seconds: int = 3600,
+        admission_probability: float = 1.0,
+    ):
+        # max_size <= 0 disables the cache: nothing is stored, every get() misses
+        self._max_size = max(0, max_size)
+        self._slots: List[Optional[_Slot]] = [None] * self._max_size
+        self._index: Dict[bytes, int] = {}
+        self._hand = 0
         self._ttl = ttl_seconds
+        self._admission_probability = admission_probability
         self._lock = threading.Lock()
         self._hits = 0
         self._misses = 0
 
     @staticmethod
-    def _make_key(query: str) -> str:
+    def _make_key(query: str) -> bytes:
         normalized = query.strip().lower()
-        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        return hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest()
 
     def get(self, query: str) -> Optional[dict]:
         """Get cached result for query. Returns None on miss or expiry."""
         key = self._make_key(query)
-        with self._lock:
-            entry = self._cache.get(key)
-            if entry is None:
-                self._misses += 1
-                return None
-
-            if time.time() - entry["timestamp"] > self._ttl:
-                del self._cache[key]
-                self._misses += 1
-                logger.debug("Query cache expired for key %s", key[:12])
-                return None
-
-            self._cache.move_to_end(key)
-            self._hits += 1
-            logger.debug("Query cache hit for key %s", key[:12])
-            return entry["value"]
+        idx = self._index.get(key)
+        slot = self._slots[idx] if idx is not None else None
+        if slot is None or slot.key != key:
+            self._misses += 1
+            return None
+
+        if time.time() - slot.timestamp > self._ttl:
+            # Re-check under the lock: a concurrent put() may have refreshed
+            # or reused the slot since the unlocked probe above.
+            with self._lock:
+                if self._index.get(key) == idx and self._slots[idx] is slot:
+                    del self._index[key]
+                    self._slots[idx] = None
+            self._misses += 1
+            logger.debug("Query cache expired for key %s", key.hex())
+            return None
+
+        slot.referenced = True
+        self._hits += 1
+        logger.debug("Query cache hit for key %s", key.hex())
+        return slot.value
 
     def put(self, query: str, result: dict) -> None:
         """Store result in cache."""
+        if self._max_size == 0:
+            return
         key = self._make_key(query)
         with self._lock:
-            self._cache[key] = {
-                "value": result,
-                "timestamp": time.time(),
-            }
-            self._cache.move_to_end(key)
-            if len(self._cache) > self._max_size:
-                evicted_key, _ = self._cache.popitem(last=False)
-                logger.debug("Query cache evicted key %s", evicted_key[:12])
+            idx = self._index.get(key)
+            if idx is None:
+                if (
+                    len(self._index) >= self._max_size
+                    and random.random() >= self._admission_probability
+                ):
+                    return
+                idx = self._claim_slot()
+                self._index[key] = idx
+            self._slots[idx] = _Slot(key, result, time.time())
+
+    def _claim_slot(self) -> int:
+        """Advance the clock hand to a free or unreferenced slot. Caller holds the lock."""
+        while True:
+            idx = self._hand
+            self._hand = (idx + 1) % self._max_size
+            slot = self._slots[idx]
+            if slot is None:
+                return idx
+            if slot.referenced:
+                slot.referenced = False
+                continue
+            del self._index[slot.key]
+            logger.debug("Query cache evicted key %s", slot.key.hex())
+            return idx
 
     def invalidate_all(self) -> None:
         """Clear entire cache."""
         with self._lock:
-            self._cache.clear()
+            self._slots = [None] * self._max_size
+            self._index.clear()
+            self._hand = 0
             logger.info("Query cache cleared")
 
     def get_stats(self) -> dict:
@@ -78,9 +140,10 @@ class QueryCache:
         with self._lock:
             total = self._hits + self._misses
             return {
-                "size": len(self._cache),
+                "size": len(self._index),
                 "max_size": self._max_size,
                 "ttl_seconds": self._ttl,
+                "admission_probability": self._admission_probability,
                 "hits": self._hits,
                 "misses": self._misses,
                 "hit_rate": round(self._hits / total, 3) if total > 0 else 0,
@@ -98,5 +161,192 @@ def get_query_cache() -> QueryCache:
         _query_cache = QueryCache(
             max_size=config.QUERY_CACHE_MAX_SIZE,
             ttl_seconds=config.QUERY_CACHE_TTL_SECONDS,
+            admission_probability=config.QUERY_CACHE_ADMISSION_PROBABILITY,
         )
     return _query_cache
+
+
+_graph_cache: Optional[QueryCache] = None
+
+
+def get_graph_cache() -> QueryCache:
+    """Get or create the global cache for read-only knowledge graph lookups."""
+    global _graph_cache
+    if _graph_cache is None:
+        from core import config
+        _graph_cache = QueryCache(
+            max_size=config.GRAPH_CACHE_MAX_SIZE,
+            ttl_seconds=config.GRAPH_CACHE_TTL_SECONDS,
+        )
+    return _graph_cache
+
+
+_rerank_cache: Optional[QueryCache] = None
+
+
+def get_rerank_cache() -> QueryCache:
+    """Get or create the global cache of rerank orderings per (query, candidate set)."""
+    global _rerank_cache
+    if _rerank_cache is None:
+        from core import config
+        _rerank_cache = QueryCache(
+            max_size=config.RERANK_CACHE_MAX_SIZE,
+            ttl_seconds=config.RERANK_CACHE_TTL_SECONDS,
+        )
+    return _rerank_cache
+
+
+class ScorerCache:
+    """
+    SQLite-backed cache of rerank scores keyed by (query, passage).
+
+    Both parts of the key are stored as 16-byte BLAKE2b digests. Callers fold
+    the rerank model into the query key so scores from different models never
+    mix. WAL mode lets workers read while another one writes. Entries older
+    than ``ttl_seconds`` are ignored, and purged on open.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int = 86400):
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS scores ("
+                "qhash BLOB NOT NULL, dhash BLOB NOT NULL, "
+                "score REAL NOT NULL, created_at REAL NOT NULL, "
+                "PRIMARY KEY (qhash, dhash))"
+            )
+            self._conn.execute(
+                "DELETE FROM scores WHERE created_at < ?",
+                (time.time() - self._ttl,),
+            )
+
+    @staticmethod
+    def _digest(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def get_many(self, query_key: str, passages: Sequence[str]) -> Dict[int, float]:
+        """Return ``{passage_index: score}`` for passages with a fresh cached score."""
+        if not passages:
+            return {}
+        dhashes = [self._digest(p) for p in passages]
+        unique = list(dict.fromkeys(dhashes))
+        placeholders = ",".join("?" * len(unique))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT dhash, score FROM scores "
+                f"WHERE qhash = ? AND created_at >= ? AND dhash IN ({placeholders})",
+                (self._digest(query_key), time.time() - self._ttl, *unique),
+            ).fetchall()
+        found = dict(rows)
+        return {i: found[d] for i, d in enumerate(dhashes) if d in found}
+
+    def put_many(self, query_key: str, scored: Sequence[Tuple[str, float]]) -> None:
+        """Store ``(passage, score)`` pairs for *query_key*."""
+        if not scored:
+            return
+        qhash = self._digest(query_key)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO scores (qhash, dhash, score, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(qhash, self._digest(p), float(score), now) for p, score in scored],
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_scorer_cache: Optional[ScorerCache] = None
+
+
+def get_scorer_cache() -> Optional[ScorerCache]:
+    """Get or create the rerank score cache; None when RERANK_SCORE_CACHE_PATH is unset."""
+    global _scorer_cache
+    if _scorer_cache is None:
+        from core import config
+        if not config.RERANK_SCORE_CACHE_PATH:
+            return None
+        _scorer_cache = ScorerCache(
+            config.RERANK_SCORE_CACHE_PATH,
+            ttl_seconds=config.RERANK_SCORE_CACHE_TTL_SECONDS,
+        )
+    return _scorer_cache
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed cache of query embeddings, shared by every worker process
+    on the host and kept across restarts.
+
+    Keys are 16-byte BLAKE2b digests of (model, text); vectors are stored as
+    raw float32 bytes. WAL mode lets workers read while another one writes.
+    Entries older than ``ttl_seconds`` are ignored, and purged on open.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int = 86400):
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "khash BLOB PRIMARY KEY, vector BLOB NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE created_at < ?",
+                (time.time() - self._ttl,),
+            )
+
+    @staticmethod
+    def _digest(model: str, text: str) -> bytes:
+        return hashlib.blake2b(
+            f"{model}\n{text}".encode("utf-8"), digest_size=16
+        ).digest()
+
+    def get(self, model: str, text: str) -> Optional[bytes]:
+        """Return the cached float32 vector bytes for *text*, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector FROM embeddings WHERE khash = ? AND created_at >= ?",
+                (self._digest(model, text), time.time() - self._ttl),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, model: str, text: str, vector: bytes) -> None:
+        """Store float32 *vector* bytes for *text*."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (khash, vector, created_at) "
+                "VALUES (?, ?, ?)",
+                (self._digest(model, text), vector, time.time()),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Get or create the shared embedding cache; None when EMBEDDING_CACHE_PATH is unset."""
+    global _embedding_cache
+    if _embedding_cache is None:
+        from core import config
+        if not config.EMBEDDING_CACHE_PATH:
+            return None
+        _embedding_cache = EmbeddingCache(
+            config.EMBEDDING_CACHE_PATH,
+            ttl_seconds=config.EMBEDDING_CACHE_TTL_SECONDS,
+        )
+    return _embedding_cache
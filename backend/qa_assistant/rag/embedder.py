@@ -2,24 +2,38 @@
 Embedding service for generating vector embeddings (query-time only).
 """
 
-import hashlib
-import json
-import urllib.request
 from collections import OrderedDict
-from typing import List
+from typing import Any, Dict, List, Optional
 import logging
 import os
+import sqlite3
+import threading
 
-from core import config
+import httpx
+import numpy as np
+import orjson
+
+from rag.cache import EmbeddingCache, get_embedding_cache
 
 logger = logging.getLogger(__name__)
 
+# Texts longer than this are embedded but never cached
+_MAX_CACHED_TEXT_LENGTH = 4096
+
+
+def _as_vector(embedding: List[float]) -> np.ndarray:
+    """Pack an API embedding into a read-only float32 array (safe to share from the cache)."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    vector.flags.writeable = False
+    return vector
+
 
 class EmbeddingService:
     """Service for generating text embeddings using OpenAI-compatible API."""
 
     def __init__(self, base_url: str, api_key: str, model: str,
-                 cache_max_size: int = 256):
+                 cache_max_size: int = 256,
+                 disk_cache: Optional[EmbeddingCache] = None):
         """
         Initialize embedding service.
 
@@ -28,6 +42,9 @@ class EmbeddingService:
             api_key: API key for authentication
             model: Embedding model name
             cache_max_size: Maximum number of embeddings to cache in memory
+                (0 disables caching)
+            disk_cache: Optional on-disk cache consulted on in-memory misses,
+                shared with other worker processes
         """
         # Normalize base_url: ensure it ends with /v1
         base = base_url.rstrip("/")
@@ -36,10 +53,54 @@ class EmbeddingService:
         self.base_url = base
         self.api_key = api_key
         self.model = model
-        self._cache: OrderedDict[str, List[float]] = OrderedDict()
+        # One pooled client per service so consecutive calls reuse the
+        # keep-alive connection instead of a fresh TCP + TLS handshake
+        self._client = httpx.Client(headers={
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        })
+        # Keyed by the normalized text itself: dict hashing already covers it
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
         self._cache_max_size = cache_max_size
+        # Retrievers on concurrent requests share this service
+        self._cache_lock = threading.Lock()
+        self._disk_cache = disk_cache
+
+    def close(self) -> None:
+        """Close the pooled HTTP client."""
+        self._client.close()
+
+    def _cache_get(self, key: str) -> Optional[np.ndarray]:
+        """Return the cached embedding for *key* and mark it recently used."""
+        with self._cache_lock:
+            embedding = self._cache.get(key)
+            if embedding is not None:
+                self._cache.move_to_end(key)
+            return embedding
+
+    def _cache_put(self, key: str, embedding: np.ndarray) -> None:
+        """Cache *embedding*, evicting the least recently used entry if full."""
+        with self._cache_lock:
+            self._cache[key] = embedding
+            self._cache.move_to_end(key)
+            if len(self._cache) > self._cache_max_size:
+                self._cache.popitem(last=False)
 
-    def embed_text(self, text: str) -> List[float]:
+    def _post_embeddings(self, inputs: Any, timeout: int) -> Dict[str, Any]:
+        """POST *inputs* to the embeddings endpoint and return the decoded body."""
+        payload = {
+            "model": self.model,
+            "input": inputs
+        }
+        response = self._client.post(
+            f"{self.base_url}/embeddings",
+            content=orjson.dumps(payload),
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
+    def embed_text(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text (with LRU cache).
 
@@ -47,52 +108,53 @@ class EmbeddingService:
             text: Text to embed
 
         Returns:
-            Embedding vector as list of floats
+            Embedding vector as a read-only float32 array
         """
-        # Check cache first
-        cache_key = hashlib.sha256(
-            text.strip().lower().encode("utf-8")
-        ).hexdigest()
-
-        if cache_key in self._cache:
-            self._cache.move_to_end(cache_key)
-            logger.debug("Embedding cache hit")
-            return self._cache[cache_key]
-
-        endpoint = f"{self.base_url}/embeddings"
-        payload = {
-            "model": self.model,
-            "input": text
-        }
-
-        data = json.dumps(payload).encode("utf-8")
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-
-        req = urllib.request.Request(endpoint, data=data, headers=headers, method="POST")
+        # Check cache first (long inputs are not cached to bound memory)
+        cache_key = text.strip().lower()
+        cacheable = (
+            self._cache_max_size > 0
+            and len(cache_key) <= _MAX_CACHED_TEXT_LENGTH
+        )
+
+        if cacheable:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                logger.debug("Embedding cache hit")
+                return cached
+            if self._disk_cache is not None:
+                try:
+                    blob = self._disk_cache.get(self.model, cache_key)
+                except sqlite3.Error as exc:
+                    logger.warning("Embedding disk cache read failed: %s", exc)
+                    blob = None
+                if blob is not None:
+                    # frombuffer over bytes is already read-only
+                    embedding = np.frombuffer(blob, dtype=np.float32)
+                    self._cache_put(cache_key, embedding)
+                    logger.debug("Embedding disk cache hit")
+                    return embedding
 
         try:
-            with urllib.request.urlopen(req, timeout=30) as response:
-                body = response.read().decode("utf-8")
-                result = json.loads(body)
-
-            embedding = result["data"][0]["embedding"]
+            result = self._post_embeddings(text, timeout=30)
+            embedding = _as_vector(result["data"][0]["embedding"])
             logger.debug(f"Generated embedding with dimension {len(embedding)}")
-
-            # Store in cache, evict oldest if over limit
-            self._cache[cache_key] = embedding
-            if len(self._cache) > self._cache_max_size:
-                self._cache.popitem(last=False)
-
-            return embedding
-
         except Exception as e:
             logger.error(f"Failed to generate embedding: {e}")
             raise
 
-    def embed_batch(self, texts: List[str], batch_size: int = 100) -> List[List[float]]:
+        # Store in cache, evict oldest if over limit
+        if cacheable:
+            self._cache_put(cache_key, embedding)
+            if self._disk_cache is not None:
+                try:
+                    self._disk_cache.put(self.model, cache_key, embedding.tobytes())
+                except sqlite3.Error as exc:
+                    logger.warning("Embedding disk cache write failed: %s", exc)
+
+        return embedding
+
+    def embed_batch(self, texts: List[str], batch_size: int = 100) -> List[np.ndarray]:
         """
         Generate embeddings for multiple texts in batches.
 
@@ -101,7 +163,7 @@ class EmbeddingService:
             batch_size: Maximum texts per batch
 
         Returns:
-            List of embedding vectors
+            List of read-only float32 embedding vectors
         """
         all_embeddings = []
 
@@ -109,56 +171,85 @@ class EmbeddingService:
             batch = texts[i:i + batch_size]
             logger.info(f"Processing batch {i // batch_size + 1}/{(len(texts) + batch_size - 1) // batch_size}")
 
-            endpoint = f"{self.base_url}/embeddings"
-            payload = {
-                "model": self.model,
-                "input": batch
-            }
-
-            data = json.dumps(payload).encode("utf-8")
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}"
-            }
-
-            req = urllib.request.Request(endpoint, data=data, headers=headers, method="POST")
-
-            try:
-                with urllib.request.urlopen(req, timeout=60) as response:
-                    body = response.read().decode("utf-8")
-                    result = json.loads(body)
-
-                data_items = result.get("data", [])
-                if not data_items:
-                    raise ValueError("Embedding API returned empty data")
-                if isinstance(data_items[0], dict) and "index" in data_items[0]:
-                    data_items = sorted(data_items, key=lambda item: item.get("index", 0))
-                batch_embeddings = [item["embedding"] for item in data_items]
-                all_embeddings.extend(batch_embeddings)
-
-            except Exception as e:
-                logger.error(f"Failed to generate batch embeddings: {e}")
-                raise
+            # Resolve each distinct text once: from the cache, else via the API
+            resolved: Dict[str, np.ndarray] = {}
+            pending: List[str] = []
+            for text in dict.fromkeys(batch):
+                cached = self._cache_get(text.strip().lower())
+                if cached is not None:
+                    resolved[text] = cached
+                else:
+                    pending.append(text)
+
+            if pending:
+                try:
+                    result = self._post_embeddings(pending, timeout=60)
+                    data_items = result.get("data", [])
+                    if not data_items:
+                        raise ValueError("Embedding API returned empty data")
+                    if isinstance(data_items[0], dict) and "index" in data_items[0]:
+                        data_items = sorted(data_items, key=lambda item: item.get("index", 0))
+                    if len(data_items) != len(pending):
+                        raise ValueError(
+                            f"Embedding API returned {len(data_items)} embeddings for {len(pending)} inputs"
+                        )
+                    resolved.update(zip(pending, (_as_vector(item["embedding"]) for item in data_items)))
+
+                except Exception as e:
+                    logger.error(f"Failed to generate batch embeddings: {e}")
+                    raise
+
+            all_embeddings.extend(resolved[text] for text in batch)
 
         logger.info(f"Generated {len(all_embeddings)} embeddings")
         return all_embeddings
 
 
+_embedding_service: Optional[EmbeddingService] = None
+# Concurrent first requests must not each build a service (and leak a client)
+_embedding_service_lock = threading.Lock()
+
+
 def create_embedding_service() -> EmbeddingService:
     """
-    Create embedding service from environment variables.
+    Get or create the shared embedding service from environment variables.
+
+    The instance is built on first call and reused afterwards, so all requests
+    share one HTTP connection pool and one embedding cache. Environment changes
+    after that first call are not picked up until reset_embedding_service().
 
     Returns:
         Configured EmbeddingService instance
     """
-    base_url = os.getenv("HDMS_BASE_URL", "https://api.apiyi.com")
-    api_key = os.getenv("HDMS_API_KEY", "")
-    model = os.getenv("EMBEDDING_MODEL", config.EMBEDDING_MODEL)
-
-    if not api_key:
-        raise ValueError("HDMS_API_KEY environment variable is required")
-
-    return EmbeddingService(
-        base_url, api_key, model,
-        cache_max_size=config.EMBEDDING_CACHE_MAX_SIZE,
-    )
+    global _embedding_service
+    if _embedding_service is not None:
+        return _embedding_service
+
+    with _embedding_service_lock:
+        if _embedding_service is not None:
+            return _embedding_service
+
+        from core import config
+
+        base_url = os.getenv("HDMS_BASE_URL", "https://api.apiyi.com")
+        api_key = os.getenv("HDMS_API_KEY", "")
+        model = os.getenv("EMBEDDING_MODEL", config.EMBEDDING_MODEL)
+
+        if not api_key:
+            raise ValueError("HDMS_API_KEY environment variable is required")
+
+        _embedding_service = EmbeddingService(
+            base_url, api_key, model,
+            cache_max_size=config.EMBEDDING_CACHE_MAX_SIZE,
+            disk_cache=get_embedding_cache(),
+        )
+        return _embedding_service
+
+
+def reset_embedding_service() -> None:
+    """Close and drop the shared embedding service (shutdown and tests)."""
+    global _embedding_service
+    with _embedding_service_lock:
+        if _embedding_service is not None:
+            _embedding_service.close()
+            _embedding_service = None
@@ -5,10 +5,15 @@ Only includes query methods needed by the retriever.
 Graph construction logic stays in data_process/KG_process/.
 """
 
-from typing import List, Dict, Any, Optional
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 import logging
 
-from core.database.neo4j_client import Neo4jClient
+from rag.cache import get_graph_cache
+
+if TYPE_CHECKING:
+    from core.database.neo4j_client import Neo4jClient
 
 logger = logging.getLogger(__name__)
 
@@ -46,21 +51,29 @@ class GraphQueryService:
         Returns:
             Dictionary with plot information and relationships
         """
+        cache = get_graph_cache()
+        cache_key = f"get_plot_info:{plot_name}"
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Aggregate each relationship type before expanding the next one, so
+        # rows do not multiply into indicators x functions x requirements x locations.
         cypher = """
         MATCH (p:Plot {name: $plot_name})
         OPTIONAL MATCH (p)-[r:HAS_INDICATOR]->(i:Indicator)
+        WITH p, collect(distinct {indicator: i.name, value: r.value}) as indicators
         OPTIONAL MATCH (p)-[:HAS_FUNCTION]->(f:Function)
+        WITH p, indicators, collect(distinct f.name) as functions
         OPTIONAL MATCH (p)-[:HAS_REQUIREMENT]->(req:Requirement)
+        WITH p, indicators, functions, collect(distinct req.description) as requirements
         OPTIONAL MATCH (p)-[:LOCATED_IN]->(loc:Location)
-        RETURN p,
-               collect(distinct {indicator: i.name, value: r.value}) as indicators,
-               collect(distinct f.name) as functions,
-               collect(distinct req.description) as requirements,
+        RETURN p, indicators, functions, requirements,
                collect(distinct loc.name) as locations
         """
 
         results = self.neo4j.query(cypher, {"plot_name": plot_name})
 
-        if results:
-            return results[0]
-        return {}
+        info = results[0] if results else {}
+        cache.put(cache_key, info)
+        return info
@@ -5,15 +5,69 @@ to re-score fused retrieval results before they are sent to the LLM.
 
 from __future__ import annotations
 
-import json
+import hashlib
+import heapq
 import logging
-import urllib.request
-from typing import Any, Dict, List
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+import httpx
+import orjson
 
 from core import config as app_config
+from rag.cache import get_rerank_cache, get_scorer_cache
 
 logger = logging.getLogger(__name__)
 
+# Shared across Reranker instances (the retriever builds one per request) so
+# rerank calls reuse keep-alive connections instead of a new TLS handshake.
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = threading.Lock()
+
+# Upper bound on a (decompressed) rerank response. Generous enough for APIs
+# that echo every document back, small enough that a misbehaving endpoint
+# cannot balloon worker memory.
+_MAX_RESPONSE_BASE_BYTES = 64 * 1024
+_MAX_RESPONSE_BYTES_PER_PASSAGE = 8 * 1024
+
+# Passages are truncated to this many characters before scoring
+_MAX_PASSAGE_CHARS = 512
+
+
+def _stringify_data(data: Any, limit: int = _MAX_PASSAGE_CHARS) -> str:
+    """
+    Compact JSON text of graph *data*, truncated to *limit* characters.
+
+    orjson encodes the payload in C; only the bytes that can fall within the
+    first *limit* characters (at most 4 bytes each in UTF-8) are decoded, and
+    a character split by the cut is dropped.
+    """
+    raw = orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return raw[:4 * limit].decode("utf-8", "ignore")[:limit]
+
+
+def _get_http_client() -> httpx.Client:
+    """Get or create the pooled HTTP client for rerank calls."""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = httpx.Client(
+                    limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+                    transport=httpx.HTTPTransport(retries=2),
+                )
+    return _http_client
+
+
+def close_http_client() -> None:
+    """Close the pooled rerank HTTP client (called on app shutdown)."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+
 
 class Reranker:
     """Calls a Rerank API that follows the Cohere / DMXAPI rerank interface."""
@@ -45,15 +99,23 @@ class Reranker:
 
         Each document dict **must** contain a ``"text"`` key (the passage to
         score).  The method returns a **new** list sorted by relevance, each
-        item enriched with ``rerank_score``.
+        item enriched with ``rerank_score`` (a lone document is returned
+        unscored, as there is nothing to rank it against).
 
-        If the API call fails the original list is returned unchanged so that
-        the pipeline degrades gracefully.
+        API failures propagate; the caller decides how to degrade (the
+        retriever keeps the fusion order and does not cache the result).
         """
         if not documents:
             return documents
 
-        effective_top_n = top_n if top_n is not None else self.top_n
+        effective_top_n = min(
+            top_n if top_n is not None else self.top_n,
+            len(documents),
+        )
+        if len(documents) == 1 and effective_top_n == 1:
+            # Nothing to order; skip the API round-trip. No score was
+            # computed, so none is attached.
+            return [dict(documents[0])]
 
         # Build the list of plain-text passages for the API
         passages: List[str] = []
@@ -62,19 +124,26 @@ class Reranker:
             if not text:
                 # Fallback: try to build a string from graph data
                 data = doc.get("data")
-                if isinstance(data, dict):
-                    text = json.dumps(data, ensure_ascii=False)[:512]
-                elif isinstance(data, list):
-                    text = json.dumps(data, ensure_ascii=False)[:512]
+                if isinstance(data, (dict, list)):
+                    text = _stringify_data(data)
                 else:
-                    text = str(doc)[:512]
-            passages.append(text[:512])  # Truncate to avoid token limits
+                    text = str(doc)[:_MAX_PASSAGE_CHARS]
+            passages.append(text[:_MAX_PASSAGE_CHARS])  # Truncate to avoid token limits
 
-        try:
-            ranked_indices = self._call_api(query, passages, effective_top_n)
-        except Exception as exc:
-            logger.warning("Rerank API call failed, falling back to original order: %s", exc)
-            return documents[:effective_top_n]
+        # Identical candidate sets recur on retries and repeated questions.
+        # Hash the raw text: QueryCache folds case and whitespace in its keys,
+        # which would let passages differing only in case share scores.
+        rerank_cache = get_rerank_cache()
+        cache_key = hashlib.blake2b(
+            "\x1f".join((self.model, str(effective_top_n), query, *passages)).encode("utf-8"),
+            digest_size=16,
+        ).hexdigest()
+        cached = rerank_cache.get(cache_key)
+        if cached is not None:
+            ranked_indices = cached["ranked"]
+        else:
+            ranked_indices = self._rank_passages(query, passages, effective_top_n)
+            rerank_cache.put(cache_key, {"ranked": ranked_indices})
 
         # Re-order documents according to API response
         reranked: List[Dict[str, Any]] = []
@@ -96,6 +165,70 @@ class Reranker:
     # Internal helpers
     # ------------------------------------------------------------------
 
+    def _rank_passages(
+        self,
+        query: str,
+        passages: List[str],
+        top_n: int,
+    ) -> List[tuple[int, float]]:
+        """
+        Return the *top_n* ``(passage_index, score)`` pairs. Identical passages
+        (e.g. the same paragraph surfaced by two sources) are scored once and
+        share the score.
+        """
+        unique_index: Dict[str, int] = {}
+        doc_groups: List[List[int]] = []
+        for doc_idx, passage in enumerate(passages):
+            u = unique_index.setdefault(passage, len(unique_index))
+            if u == len(doc_groups):
+                doc_groups.append([])
+            doc_groups[u].append(doc_idx)
+
+        # Rerank APIs reject top_n above the number of documents sent
+        ranked_unique = self._score_passages(
+            query, list(unique_index), min(top_n, len(unique_index))
+        )
+        return [
+            (doc_idx, score)
+            for u, score in ranked_unique
+            if 0 <= u < len(doc_groups)
+            for doc_idx in doc_groups[u]
+        ][:top_n]
+
+    def _score_passages(
+        self,
+        query: str,
+        passages: List[str],
+        top_n: int,
+    ) -> List[tuple[int, float]]:
+        """
+        Return the *top_n* ``(index, score)`` pairs, consulting the on-disk
+        score cache when it is enabled so only unseen passages hit the API.
+        """
+        score_cache = get_scorer_cache()
+        if score_cache is None:
+            return self._call_api(query, passages, top_n)
+
+        cache_key = f"{self.model}\n{query}"
+        try:
+            scores = score_cache.get_many(cache_key, passages)
+        except sqlite3.Error as exc:
+            logger.warning("Rerank score cache read failed, scoring all passages: %s", exc)
+            scores = {}
+        missing = [i for i in range(len(passages)) if i not in scores]
+        if missing:
+            # Score every uncached passage (not just top_n) so all can be cached
+            fresh = self._call_api(query, [passages[i] for i in missing], len(missing))
+            fresh = [(missing[j], score) for j, score in fresh if 0 <= j < len(missing)]
+            try:
+                score_cache.put_many(cache_key, [(passages[i], score) for i, score in fresh])
+            except sqlite3.Error as exc:
+                logger.warning("Rerank score cache write failed: %s", exc)
+            scores.update(fresh)
+        logger.debug("Rerank score cache: %d/%d passages cached", len(passages) - len(missing), len(passages))
+
+        return heapq.nlargest(top_n, scores.items(), key=lambda item: item[1])
+
     def _call_api(
         self,
         query: str,
@@ -115,16 +248,25 @@ class Reranker:
             "top_n": top_n,
         }
 
-        data = json.dumps(payload).encode("utf-8")
+        data = orjson.dumps(payload)
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}",
         }
 
-        req = urllib.request.Request(endpoint, data=data, headers=headers, method="POST")
-
-        with urllib.request.urlopen(req, timeout=15) as resp:
-            body = json.loads(resp.read().decode("utf-8"))
+        max_bytes = _MAX_RESPONSE_BASE_BYTES + _MAX_RESPONSE_BYTES_PER_PASSAGE * len(passages)
+        with _get_http_client().stream(
+            "POST", endpoint, content=data, headers=headers, timeout=15
+        ) as resp:
+            resp.raise_for_status()
+            chunks: List[bytes] = []
+            received = 0
+            for chunk in resp.iter_bytes():
+                received += len(chunk)
+                if received > max_bytes:
+                    raise ValueError(f"Rerank response exceeds {max_bytes} bytes")
+                chunks.append(chunk)
+        body = orjson.loads(b"".join(chunks))
 
         # The response follows the Cohere / DMXAPI format:
         # { "results": [ {"index": 0, "relevance_score": 0.95}, ... ] }
@@ -4,8 +4,12 @@ Multi-source retriever for RAG system.
 
 from __future__ import annotations
 
+import functools
+import heapq
 import re
-from typing import List, Dict, Any, Optional
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, TypeVar
 import logging
 
 from core import config as app_config
@@ -14,12 +18,104 @@ from core.database.mongodb_client import MongoDBClient
 from rag.graph_query import GraphQueryService
 from rag.embedder import EmbeddingService
 from rag.reranker import Reranker
+from rag.semantic_cache import get_semantic_cache
 
 logger = logging.getLogger(__name__)
 
 # Shared patterns for query analysis
 PLOT_PATTERN = re.compile(r'DU\d{2}-\d{2}(?:-\d+)?')
 INDICATOR_KEYWORDS = ["容积率", "建筑限高", "建筑密度", "绿地率", "退线", "停车"]
+# One-pass scan for all keywords (none is a substring of, or overlaps, another)
+INDICATOR_RE = re.compile("|".join(map(re.escape, INDICATOR_KEYWORDS)))
+
+# Chunk fields keyword hits need downstream (fusion, rerank); skips the large
+# enhanced_text / bookkeeping fields. "_id" and the text score come back anyway.
+_KEYWORD_FIELDS = {"text": 1, "doc_id": 1, "chunk_index": 1, "section_title": 1, "file_name": 1}
+
+# Vector hits keep this much chunk text: above format_context's 800-char
+# excerpt (so its "..." marker still shows) and the reranker's 512-char passage
+_MAX_RESULT_TEXT_CHARS = 1024
+
+# Shared by all retrievers; the DB drivers release the GIL while waiting on I/O
+_SEARCH_POOL = ThreadPoolExecutor(
+    max_workers=app_config.RETRIEVAL_MAX_WORKERS,
+    thread_name_prefix="retriever",
+)
+# Free _SEARCH_POOL workers; searches never queue behind other requests' searches
+_SEARCH_SLOTS = threading.BoundedSemaphore(app_config.RETRIEVAL_MAX_WORKERS)
+# Graph search itself runs on _SEARCH_POOL, so its lookups need their own
+# pool or they could wait on workers that are all blocked waiting on them
+_GRAPH_LOOKUP_POOL = ThreadPoolExecutor(
+    max_workers=app_config.GRAPH_LOOKUP_MAX_WORKERS,
+    thread_name_prefix="graph-lookup",
+)
+
+_T = TypeVar("_T")
+
+
+def _submit_search(fn: Callable[..., _T], *args: Any) -> Future:
+    """
+    Run *fn* on _SEARCH_POOL when a worker is free, else inline on the
+    calling thread (the pre-pool behaviour) so a saturated pool never adds
+    queueing delay on top of the search itself.
+    """
+    if not _SEARCH_SLOTS.acquire(blocking=False):
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+    try:
+        future = _SEARCH_POOL.submit(fn, *args)
+    except BaseException:
+        _SEARCH_SLOTS.release()
+        raise
+    future.add_done_callback(lambda _: _SEARCH_SLOTS.release())
+    return future
+
+
+def _map_lookups(fn: Callable[[str], _T], items: Sequence[str]) -> List[_T]:
+    """Apply *fn* to each item, concurrently when there are several; keeps input order."""
+    if len(items) <= 1:
+        return [fn(item) for item in items]
+    return list(_GRAPH_LOOKUP_POOL.map(fn, items))
+
+
+def _match_indicators(query: str) -> List[str]:
+    """Return the indicator keywords mentioned in *query*, in INDICATOR_KEYWORDS order."""
+    found = set(INDICATOR_RE.findall(query))
+    if not found:
+        return []
+    return [kw for kw in INDICATOR_KEYWORDS if kw in found]
+
+
+class QueryFeatures(NamedTuple):
+    """What retrieval routing needs to know about a query."""
+
+    plots: Tuple[str, ...]
+    indicators: Tuple[str, ...]
+
+
+@functools.lru_cache(maxsize=512)
+def _analyze_query(query: str) -> QueryFeatures:
+    """Scan *query* once for plot IDs and indicator keywords, memoized for repeated queries."""
+    return QueryFeatures(
+        # A plot named twice is looked up once
+        plots=tuple(dict.fromkeys(PLOT_PATTERN.findall(query))),
+        indicators=tuple(_match_indicators(query)),
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def _query_weights(query: str) -> Tuple[float, float, float]:
+    """(vector, graph, keyword) fusion weights for *query*, memoized for repeated queries."""
+    features = _analyze_query(query)
+    weights = MultiSourceRetriever._weights_for(
+        has_plot_id=bool(features.plots),
+        has_indicator=bool(features.indicators),
+    )
+    return weights["vector"], weights["graph"], weights["keyword"]
 
 
 class MultiSourceRetriever:
@@ -54,7 +150,8 @@ class MultiSourceRetriever:
         top_k: int = 5,
         use_vector: bool = True,
         use_graph: bool = True,
-        use_keyword: bool = True
+        use_keyword: bool = True,
+        query_embedding: Optional[Any] = None
     ) -> Dict[str, Any]:
         """
         Retrieve relevant information from multiple sources.
@@ -65,9 +162,10 @@ class MultiSourceRetriever:
             use_vector: Whether to use vector search
             use_graph: Whether to use graph search
             use_keyword: Whether to use keyword search
+            query_embedding: Embedding of *query* if the caller already has it
 
         Returns:
-            Dictionary with results from each source
+            Dictionary with results from each source and the fusion "weights"
         """
         results = {
             "vector_results": [],
@@ -76,34 +174,63 @@ class MultiSourceRetriever:
             "fused_results": []
         }
 
-        # Vector search
-        if use_vector:
-            try:
-                results["vector_results"] = self._vector_search(query, top_k)
-            except Exception as e:
-                logger.error(f"Vector search failed: {e}")
+        # Scan the query once; graph search and fusion weights share the matches
+        plots, indicators = _analyze_query(query)
+
+        # Each search blocks on a different backend (Milvus / Neo4j / MongoDB),
+        # so run them concurrently: latency is the slowest search, not the sum.
+        # Graph and keyword searches go first so they overlap the embedding
+        # round-trip; vector search needs the embedding and is submitted last.
+        searches = []
+        # Graph search only looks up plots and indicators named in the query;
+        # with neither there is nothing to ask Neo4j, so skip the task
+        if use_graph and (plots or indicators):
+            searches.append(("Graph", "graph_results",
+                             _submit_search(self._graph_search, query, plots, indicators)))
+        if use_keyword:
+            searches.append(("Keyword", "keyword_results",
+                             _submit_search(self._keyword_search, query, top_k)))
+
+        # Near-duplicate of a recent query with the same plots, indicators and
+        # options: reuse its results and drop the searches already started.
+        # The embedding is needed by vector search anyway and is passed
+        # straight through to it.
+        semantic_cache = get_semantic_cache() if use_vector else None
+        cache_tag = (plots, indicators, top_k, use_vector, use_graph, use_keyword)
+        if semantic_cache is not None:
+            if query_embedding is None:
+                try:
+                    query_embedding = self.embedder.embed_text(query)
+                except Exception as e:
+                    logger.warning(f"Semantic cache skipped, embedding failed: {e}")
+            if query_embedding is not None:
+                cached = semantic_cache.get(query_embedding, cache_tag)
+                if cached is not None:
+                    for _, _, future in searches:
+                        future.cancel()
+                    return dict(cached)
 
-        # Graph search
-        if use_graph:
-            try:
-                results["graph_results"] = self._graph_search(query)
-            except Exception as e:
-                logger.error(f"Graph search failed: {e}")
+        if use_vector:
+            searches.append(("Vector", "vector_results",
+                             _submit_search(self._vector_search, query, top_k, query_embedding)))
 
-        # Keyword search
-        if use_keyword:
+        complete = True  # only complete results go into the semantic cache
+        for label, key, future in searches:
             try:
-                results["keyword_results"] = self._keyword_search(query, top_k)
+                results[key] = future.result()
             except Exception as e:
-                logger.error(f"Keyword search failed: {e}")
+                complete = False
+                logger.error(f"{label} search failed: {e}")
 
-        # Fuse results
+        # Fuse results; the weights are returned too, for callers reporting them
+        results["weights"] = self._weights_for(bool(plots), bool(indicators))
         results["fused_results"] = self._fuse_results(
             results["vector_results"],
             results["graph_results"],
             results["keyword_results"],
             top_k,
-            query=query
+            query=query,
+            weights=results["weights"],
         )
 
         # Rerank fused results if reranker is available
@@ -119,23 +246,33 @@ class MultiSourceRetriever:
                 results["reranked"] = True
                 logger.info("Rerank applied successfully (%d results)", len(reranked))
             except Exception as exc:
+                complete = False
                 logger.warning("Rerank failed, keeping original fusion order: %s", exc)
 
+        if semantic_cache is not None and query_embedding is not None and complete:
+            semantic_cache.put(query_embedding, cache_tag, results)
+
         return results
 
-    def _vector_search(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+    def _vector_search(
+        self,
+        query: str,
+        top_k: int,
+        query_embedding: Optional[Any] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Perform vector similarity search.
 
         Args:
             query: Query text
             top_k: Number of results
+            query_embedding: Embedding of *query* if the caller already has it
 
         Returns:
             List of search results
         """
-        # Generate query embedding
-        query_embedding = self.embedder.embed_text(query)
+        if query_embedding is None:
+            query_embedding = self.embedder.embed_text(query)
 
         # Search in Milvus
         results = self.milvus.search(
@@ -146,45 +283,57 @@ class MultiSourceRetriever:
 
         # Add source and score
         for result in results:
+            text = result.get("text")
+            if text and len(text) > _MAX_RESULT_TEXT_CHARS:
+                result["text"] = text[:_MAX_RESULT_TEXT_CHARS]
             result["source"] = "vector"
             result["score"] = 1.0 - result.get("distance", 1.0)  # Convert distance to similarity
 
-        logger.info(f"Vector search returned {len(results)} results")
+        logger.info("Vector search returned %d results", len(results))
         return results
 
-    def _graph_search(self, query: str) -> List[Dict[str, Any]]:
-        """Perform graph-based search."""
-        results = []
-
-        # Extract plot names from query
-        plots = PLOT_PATTERN.findall(query)
-
-        if plots:
-            for plot_name in plots:
-                info = self.graph_store.get_plot_info(plot_name)
-                if info:
-                    results.append({
-                        "source": "graph",
-                        "type": "plot_info",
-                        "plot_name": plot_name,
-                        "data": info,
-                        "score": 0.9
-                    })
+    def _graph_search(
+        self,
+        query: str,
+        plots: Optional[Sequence[str]] = None,
+        indicators: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Perform graph-based search.
 
-        # Extract indicator keywords
-        for indicator in INDICATOR_KEYWORDS:
-            if indicator in query:
-                # Find plots with this indicator
-                cypher = """
-                MATCH (p:Plot)-[r:HAS_INDICATOR]->(i:Indicator {name: $indicator})
-                RETURN p.name as plot_name, r.value as value
-                LIMIT 5
-                """
-                indicator_results = self.graph_store.query_graph(
-                    cypher,
-                    {"indicator": indicator}
-                )
+        *plots* and *indicators* are the query's plot IDs and indicator
+        keywords; they are extracted from *query* when not supplied.
+        """
+        results = []
 
+        if plots is None or indicators is None:
+            features = _analyze_query(query)
+            plots = features.plots if plots is None else plots
+            indicators = features.indicators if indicators is None else indicators
+
+        for plot_name, info in zip(plots, _map_lookups(self.graph_store.get_plot_info, plots)):
+            if info:
+                results.append({
+                    "source": "graph",
+                    "type": "plot_info",
+                    "plot_name": plot_name,
+                    "data": info,
+                    "score": 0.9
+                })
+
+        if indicators:
+            # Plots with each indicator, all indicators in one round-trip
+            cypher = """
+            UNWIND $indicators AS indicator
+            MATCH (p:Plot)-[r:HAS_INDICATOR]->(:Indicator {name: indicator})
+            WITH indicator, collect({plot_name: p.name, value: r.value})[..5] AS hits
+            RETURN indicator, hits
+            """
+            rows = self.graph_store.query_graph(cypher, {"indicators": list(indicators)})
+            hits_by_indicator = {row["indicator"]: row["hits"] for row in rows}
+
+            for indicator in indicators:
+                indicator_results = hits_by_indicator.get(indicator)
                 if indicator_results:
                     results.append({
                         "source": "graph",
@@ -194,7 +343,7 @@ class MultiSourceRetriever:
                         "score": 0.8
                     })
 
-        logger.info(f"Graph search returned {len(results)} results")
+        logger.info("Graph search returned %d results", len(results))
         return results
 
     def _keyword_search(self, query: str, top_k: int) -> List[Dict[str, Any]]:
@@ -207,56 +356,69 @@ class MultiSourceRetriever:
 
         Returns:
             List of search results
+
+        MongoDB errors propagate so retrieve() can tell a failed search from
+        one with no hits (and keep the degraded result out of the cache).
         """
-        try:
-            # Search in chunks collection
-            results = self.mongodb.text_search(
-                "chunks",
-                query,
-                limit=top_k
-            )
-
-            # Add source and score
-            for result in results:
-                result["source"] = "keyword"
-                result["score"] = result.get("score", 0.5)
-
-            logger.info(f"Keyword search returned {len(results)} results")
-            return results
-
-        except Exception as e:
-            logger.warning(f"Keyword search not available: {e}")
-            return []
+        # Search in chunks collection
+        results = self.mongodb.text_search(
+            "chunks",
+            query,
+            limit=top_k,
+            projection=_KEYWORD_FIELDS,
+        )
+
+        # Add source and score
+        for result in results:
+            result["source"] = "keyword"
+            result["score"] = result.get("score", 0.5)
+
+        logger.info("Keyword search returned %d results", len(results))
+        return results
+
+    @staticmethod
+    def _normalize_scores(scores: List[float]) -> Tuple[float, float]:
+        """
+        Min-max bounds of one source's scores, for normalizing to [0, 1].
+
+        Returns:
+            (min_score, spread); spread is 0 when all scores are equal, in
+            which case every result normalizes to 1.0
+        """
+        if not scores:
+            return 0.0, 0.0
+        min_s = min(scores)
+        return min_s, max(scores) - min_s
 
     @staticmethod
-    def _normalize_scores(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Normalize scores to [0, 1] range using min-max normalization."""
-        if not results:
-            return results
-        scores = [r.get("score", 0) for r in results]
-        min_s, max_s = min(scores), max(scores)
-        spread = max_s - min_s
-        normalized = []
-        for r in results:
-            r_copy = dict(r)
-            if spread > 0:
-                r_copy["score"] = (r_copy.get("score", 0) - min_s) / spread
-            else:
-                r_copy["score"] = 1.0
-            normalized.append(r_copy)
-        return normalized
+    def _dedup_key(result: Dict[str, Any]) -> Any:
+        """Identity used to drop duplicate results across sources during fusion."""
+        # Milvus "id" and Mongo "_id" are the same chunk id, so a chunk found
+        # by both vector and keyword search collapses to one result
+        chunk_id = result.get("id") or result.get("_id")
+        if chunk_id:
+            return chunk_id
+        if "text" in result:
+            return result["text"][:100]
+        if "type" in result:
+            # Graph results carry no id/text: one per (type, plot or indicator)
+            return (result["type"], result.get("plot_name"), result.get("indicator"))
+        return id(result)
 
     def _compute_weights(self, query: str) -> Dict[str, float]:
+        """Compute dynamic fusion weights based on query characteristics."""
+        vector, graph, keyword = _query_weights(query)
+        return {"vector": vector, "graph": graph, "keyword": keyword}
+
+    @staticmethod
+    def _weights_for(has_plot_id: bool, has_indicator: bool) -> Dict[str, float]:
         """
-        Compute dynamic fusion weights based on query characteristics.
+        Fusion weights for an already-analyzed query.
 
         - Plot ID detected (DU01-01): boost graph weight
         - Indicator keyword detected: moderate graph boost
         - Default: vector dominates
         """
-        has_plot_id = bool(PLOT_PATTERN.search(query))
-        has_indicator = any(kw in query for kw in INDICATOR_KEYWORDS)
-
         if has_plot_id:
             return {"vector": 0.25, "graph": 0.55, "keyword": 0.20}
         elif has_indicator:
@@ -270,66 +432,54 @@ class MultiSourceRetriever:
         graph_results: List[Dict[str, Any]],
         keyword_results: List[Dict[str, Any]],
         top_k: int,
-        query: str = ""
+        query: str = "",
+        weights: Optional[Dict[str, float]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Fuse results from multiple sources using normalized scores
-        and dynamic weights based on query type.
-        """
-        weights = self._compute_weights(query) if query else {
-            "vector": 0.5, "graph": 0.3, "keyword": 0.2
-        }
-        logger.info(f"Fusion weights: {weights}")
-
-        # Normalize scores per source before weighting
-        vector_results = self._normalize_scores(list(vector_results))
-        graph_results = self._normalize_scores(list(graph_results))
-        keyword_results = self._normalize_scores(list(keyword_results))
-
-        # Combine all results with weighted scores
-        all_results = []
+        and dynamic weights based on query type (or explicit *weights*).
 
-        for result in vector_results:
-            all_results.append({
-                **result,
-                "weighted_score": result.get("score", 0) * weights["vector"]
-            })
-
-        for result in graph_results:
-            all_results.append({
-                **result,
-                "weighted_score": result.get("score", 0) * weights["graph"]
-            })
-
-        for result in keyword_results:
-            all_results.append({
-                **result,
-                "weighted_score": result.get("score", 0) * weights["keyword"]
-            })
+        Source results keep their raw "score"; the returned items are the
+        same dicts, annotated in place with "weighted_score".
+        """
+        if not (vector_results or graph_results or keyword_results):
+            return []
 
-        # Sort by weighted score
-        all_results.sort(key=lambda x: x.get("weighted_score", 0), reverse=True)
+        if weights is None:
+            weights = self._compute_weights(query) if query else {
+                "vector": 0.5, "graph": 0.3, "keyword": 0.2
+            }
+        logger.info("Fusion weights: %s", weights)
+
+        # Weight every candidate by its per-source normalized score, then
+        # pop from a heap until top_k unique results are found. The sequence
+        # number keeps ties in source order and stops dicts being compared.
+        heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        for source_results, weight in (
+            (vector_results, weights["vector"]),
+            (graph_results, weights["graph"]),
+            (keyword_results, weights["keyword"]),
+        ):
+            scores = [r.get("score", 0) for r in source_results]
+            min_s, spread = self._normalize_scores(scores)
+            for r, score in zip(source_results, scores):
+                norm = (score - min_s) / spread if spread > 0 else 1.0
+                heap.append((-norm * weight, len(heap), r))
+        heapq.heapify(heap)
 
         # Deduplicate based on chunk_id or text
         seen = set()
         fused_results = []
 
-        for result in all_results:
-            if "id" in result:
-                key = result["id"]
-            elif "text" in result:
-                key = result["text"][:100]
-            else:
-                key = str(result)
-
+        while heap and len(fused_results) < top_k:
+            neg_weighted, _, result = heapq.heappop(heap)
+            key = self._dedup_key(result)
             if key not in seen:
                 seen.add(key)
+                result["weighted_score"] = -neg_weighted
                 fused_results.append(result)
 
-            if len(fused_results) >= top_k:
-                break
-
-        logger.info(f"Fused results: {len(fused_results)} unique items")
+        logger.info("Fused results: %d unique items", len(fused_results))
         return fused_results
 
     def format_context(self, results: Dict[str, Any]) -> str:
@@ -345,14 +495,15 @@ class MultiSourceRetriever:
         Returns:
             Formatted context string
         """
-        context = ""
+        parts: List[str] = []
+        append = parts.append
         idx = 1  # global counter across all source types
         seen_ids: set = set()
 
         # Add vector results (dedup by chunk id, same as _extract_sources)
         vector_results = results.get("vector_results", [])
         if vector_results:
-            context += "## 相关文档内容\n\n"
+            append("## 相关文档内容\n\n")
             for result in vector_results[:5]:
                 chunk_id = result.get("id", "")
                 if not chunk_id or chunk_id in seen_ids:
@@ -365,16 +516,14 @@ class MultiSourceRetriever:
                 section = metadata.get("section_title", "")
                 section_label = f" - {section}" if section else ""
                 # Keep more text for better context (up to 800 chars)
-                display_text = text[:800]
-                if len(text) > 800:
-                    display_text += "..."
-                context += f"[{idx}] 来源：{file_name}{section_label}\n{display_text}\n\n"
+                ellipsis = "..." if len(text) > 800 else ""
+                append(f"[{idx}] 来源：{file_name}{section_label}\n{text[:800]}{ellipsis}\n\n")
                 idx += 1
 
         # Add graph results (dedup by plot_name, same as _extract_sources)
         graph_results = results.get("graph_results", [])
         if graph_results:
-            context += "## 知识图谱信息\n\n"
+            append("## 知识图谱信息\n\n")
             for result in graph_results:
                 if result.get("type") == "plot_info":
                     plot_name = result.get("plot_name", "")
@@ -383,15 +532,15 @@ class MultiSourceRetriever:
                     seen_ids.add(plot_name)
 
                     data = result.get("data", {})
-                    context += f"[{idx}] 地块 {plot_name}：\n"
+                    append(f"[{idx}] 地块 {plot_name}：\n")
 
                     indicators = data.get("indicators", [])
                     if indicators:
-                        context += "指标：\n"
+                        append("指标：\n")
                         for ind in indicators[:5]:
                             if ind.get("indicator"):
-                                context += f"  - {ind['indicator']}: {ind.get('value', '未指定')}\n"
-                    context += "\n"
+                                append(f"  - {ind['indicator']}: {ind.get('value', '未指定')}\n")
+                    append("\n")
                     idx += 1
 
-        return context
+        return "".join(parts)
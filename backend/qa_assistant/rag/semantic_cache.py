@@ -0,0 +1,144 @@
+"""
+Semantic caches for retrieval results and generated answers.
+
+Serves a near-duplicate query (e.g. "容积率是多少" vs "容积率多少") from the
+results of an earlier one when their embeddings are close enough. Entries
+also carry a tag (the plot IDs, indicators and retrieve options) that must
+match exactly: "DU01-01 容积率" and "DU01-02 容积率" embed almost identically
+but must never share results.
+"""
+
+import threading
+import time
+import logging
+from typing import Any, Hashable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    Thread-safe ring buffer of (unit query embedding, tag, value) entries.
+
+    Lookups compare the query against every live entry with one matrix-vector
+    product; at a few hundred entries that is cheaper than maintaining an LSH
+    index. The oldest entry is overwritten once the buffer is full.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 256,
+        ttl_seconds: int = 300,
+        threshold: float = 0.95,
+    ):
+        self._max_size = max(1, max_size)
+        self._ttl = ttl_seconds
+        self._threshold = threshold
+        self._lock = threading.Lock()
+        # Allocated on first put(), once the embedding dimension is known
+        self._vectors: Optional[np.ndarray] = None
+        self._timestamps = np.zeros(self._max_size, dtype=np.float64)
+        self._tags: List[Optional[Hashable]] = [None] * self._max_size
+        self._values: List[Optional[dict]] = [None] * self._max_size
+        self._next = 0
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _unit(embedding: Any) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else None
+
+    def get(self, embedding: Any, tag: Hashable) -> Optional[dict]:
+        """Return the value of the most similar live entry with *tag*, or None."""
+        query = self._unit(embedding)
+        with self._lock:
+            if query is None or self._vectors is None or query.shape[0] != self._vectors.shape[1]:
+                self._misses += 1
+                return None
+            sims = self._vectors @ query
+            sims[self._timestamps < time.time() - self._ttl] = -1.0
+            for i, entry_tag in enumerate(self._tags):
+                if entry_tag != tag:
+                    sims[i] = -1.0
+            best = int(np.argmax(sims))
+            if sims[best] < self._threshold:
+                self._misses += 1
+                return None
+            self._hits += 1
+            logger.debug("Semantic cache hit (similarity %.4f)", sims[best])
+            return self._values[best]
+
+    def put(self, embedding: Any, tag: Hashable, value: dict) -> None:
+        """Store *value* for the query *embedding* under *tag*."""
+        vector = self._unit(embedding)
+        if vector is None:
+            return
+        with self._lock:
+            if self._vectors is None or vector.shape[0] != self._vectors.shape[1]:
+                # First entry, or the embedding model changed: start over
+                self._vectors = np.zeros((self._max_size, vector.shape[0]), dtype=np.float32)
+                self._timestamps[:] = 0.0
+                self._tags = [None] * self._max_size
+                self._values = [None] * self._max_size
+                self._next = 0
+            idx = self._next
+            self._next = (idx + 1) % self._max_size
+            self._vectors[idx] = vector
+            self._timestamps[idx] = time.time()
+            self._tags[idx] = tag
+            self._values[idx] = value
+
+    def get_stats(self) -> dict:
+        """Return cache statistics."""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "size": sum(value is not None for value in self._values),
+                "max_size": self._max_size,
+                "ttl_seconds": self._ttl,
+                "threshold": self._threshold,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 3) if total > 0 else 0,
+            }
+
+
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Get or create the retrieval semantic cache; None when SEMANTIC_CACHE_THRESHOLD <= 0."""
+    global _semantic_cache
+    if _semantic_cache is None:
+        from core import config
+        if config.SEMANTIC_CACHE_THRESHOLD <= 0:
+            return None
+        _semantic_cache = SemanticCache(
+            max_size=config.SEMANTIC_CACHE_MAX_SIZE,
+            ttl_seconds=config.SEMANTIC_CACHE_TTL_SECONDS,
+            threshold=config.SEMANTIC_CACHE_THRESHOLD,
+        )
+    return _semantic_cache
+
+
+_semantic_answer_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_answer_cache() -> Optional[SemanticCache]:
+    """Get or create the near-duplicate answer cache; None when SEMANTIC_CACHE_THRESHOLD <= 0."""
+    global _semantic_answer_cache
+    if _semantic_answer_cache is None:
+        from core import config
+        if config.SEMANTIC_CACHE_THRESHOLD <= 0:
+            return None
+        # Answers live as long as exact-match answers in the query cache
+        _semantic_answer_cache = SemanticCache(
+            max_size=config.SEMANTIC_CACHE_MAX_SIZE,
+            ttl_seconds=config.QUERY_CACHE_TTL_SECONDS,
+            threshold=config.SEMANTIC_CACHE_THRESHOLD,
+        )
+    return _semantic_answer_cache
@@ -2,21 +2,61 @@
 RAG service for intelligent question answering.
 """
 
-import json
 import re
-import urllib.request
-from typing import List, Dict, Any, Optional, Generator, Tuple
+import threading
+from typing import List, Dict, Any, Hashable, Optional, Generator, Tuple
 import logging
 import os
 
+import httpx
 import openai
+import orjson
 
 from core import config as app_config
-from rag.retriever import MultiSourceRetriever
+from rag.retriever import MultiSourceRetriever, _analyze_query
 from rag.cache import get_query_cache
+from rag.semantic_cache import SemanticCache, get_semantic_answer_cache
 
 logger = logging.getLogger(__name__)
 
+# (cache, question embedding, tag) for the semantic answer cache
+_SemanticEntry = Tuple[SemanticCache, Any, Hashable]
+
+# Reasoning blocks some models emit ahead of the answer
+_THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL)
+
+# Shared across RAGService instances (one is built per request) so LLM calls
+# reuse keep-alive connections instead of a new TCP + TLS handshake each time.
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = threading.Lock()
+
+# Timeout for a non-streaming answer
+_ANSWER_TIMEOUT_SECONDS = 60
+
+# _generate_answer returns this prefix plus the error when the LLM call fails
+_ANSWER_ERROR_PREFIX = "抱歉，生成答案时出错："
+
+
+def _get_http_client() -> httpx.Client:
+    """Get or create the pooled HTTP client for LLM calls."""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = httpx.Client(
+                    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+                )
+    return _http_client
+
+
+def close_http_client() -> None:
+    """Close the pooled LLM HTTP client (called on app shutdown)."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+
 
 class RAGService:
     """Service for RAG-based question answering."""
@@ -55,9 +95,9 @@ class RAGService:
     ) -> Dict[str, Any]:
         """Answer a question using RAG."""
         # Check cache first
-        cache = get_query_cache()
+        semantic_entry = None
         if use_retrieval and app_config.QUERY_CACHE_ENABLED:
-            cached = cache.get(question)
+            cached, semantic_entry = self._get_cached_answer(question, top_k, history)
             if cached is not None:
                 logger.info("Returning cached answer for query")
                 return cached
@@ -69,7 +109,8 @@ class RAGService:
         if use_retrieval:
             retrieval_results = self.retriever.retrieve(
                 query=question,
-                top_k=top_k
+                top_k=top_k,
+                query_embedding=semantic_entry[1] if semantic_entry else None,
             )
             context = self.retriever.format_context(retrieval_results)
             sources = self._extract_sources(retrieval_results)
@@ -87,12 +128,83 @@ class RAGService:
             "model": self.llm_model
         }
 
-        # Store in cache
-        if use_retrieval and app_config.QUERY_CACHE_ENABLED:
-            cache.put(question, result)
+        # Store in cache; a failed generation must not be served to later askers
+        failed = answer.startswith(_ANSWER_ERROR_PREFIX)
+        if use_retrieval and app_config.QUERY_CACHE_ENABLED and not failed:
+            self._cache_answer(question, result, semantic_entry)
 
         return result
 
+    def _semantic_answer_entry(
+        self,
+        question: str,
+        top_k: int,
+        history: Optional[List[Dict[str, str]]],
+    ) -> Optional[_SemanticEntry]:
+        """
+        (cache, question embedding, tag) for the semantic answer cache, or
+        None when it is disabled or does not apply.
+
+        Answers given inside a conversation depend on its history, so only
+        questions without history are matched by similarity. The tag holds
+        the question's plots and indicators and top_k.
+        """
+        if history:
+            return None
+        semantic_cache = get_semantic_answer_cache()
+        if semantic_cache is None:
+            return None
+        try:
+            embedding = self.retriever.embedder.embed_text(question)
+        except Exception as e:
+            logger.warning(f"Semantic answer cache skipped, embedding failed: {e}")
+            return None
+        return semantic_cache, embedding, (_analyze_query(question), top_k)
+
+    def _get_cached_answer(
+        self,
+        question: str,
+        top_k: int,
+        history: Optional[List[Dict[str, str]]] = None,
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[_SemanticEntry]]:
+        """
+        Cached answer for *question*: an exact (normalized) match, else a
+        near-duplicate question asked without history, naming the same plots
+        and indicators with the same top_k.
+
+        Also returns the semantic cache entry (None on an exact hit or when
+        the semantic cache does not apply). On a miss the caller passes it to
+        retrieval and to ``_cache_answer`` so the question is embedded once.
+        """
+        cached = get_query_cache().get(question)
+        if cached is not None:
+            return cached, None
+
+        entry = self._semantic_answer_entry(question, top_k, history)
+        if entry is None:
+            return None, None
+        semantic_cache, embedding, tag = entry
+        cached = semantic_cache.get(embedding, tag)
+        if cached is not None:
+            logger.info("Semantic answer cache hit")
+        return cached, entry
+
+    def _cache_answer(
+        self,
+        question: str,
+        result: Dict[str, Any],
+        entry: Optional[_SemanticEntry] = None,
+    ) -> None:
+        """
+        Store *result* in the exact answer cache, and in the semantic one
+        when *entry* (from ``_get_cached_answer``) is given.
+        """
+        get_query_cache().put(question, result)
+
+        if entry is not None:
+            semantic_cache, embedding, tag = entry
+            semantic_cache.put(embedding, tag, result)
+
     def _build_prompt(
         self,
         question: str,
@@ -163,7 +275,7 @@ class RAGService:
     @staticmethod
     def _strip_think_tags(text: str) -> str:
         """Remove <think>...</think> blocks from text (for non-streaming)."""
-        return re.sub(r"<think>.*?</think>", "", text, flags=re.DOTALL).strip()
+        return _THINK_RE.sub("", text).strip()
 
     def _generate_answer(self, messages: List[Dict[str, str]]) -> str:
         """
@@ -183,18 +295,20 @@ class RAGService:
             "max_tokens": 2000
         }
 
-        data = json.dumps(payload).encode("utf-8")
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.llm_api_key}"
         }
 
-        req = urllib.request.Request(endpoint, data=data, headers=headers, method="POST")
-
         try:
-            with urllib.request.urlopen(req, timeout=60) as response:
-                body = response.read().decode("utf-8")
-                result = json.loads(body)
+            response = _get_http_client().post(
+                endpoint,
+                content=orjson.dumps(payload),
+                headers=headers,
+                timeout=_ANSWER_TIMEOUT_SECONDS,
+            )
+            response.raise_for_status()
+            result = orjson.loads(response.content)
 
             answer = result["choices"][0]["message"]["content"]
             # Strip <think> tags that reasoning models may include
@@ -204,7 +318,7 @@ class RAGService:
 
         except Exception as e:
             logger.error(f"Failed to generate answer: {e}")
-            return f"抱歉，生成答案时出错：{str(e)}"
+            return f"{_ANSWER_ERROR_PREFIX}{str(e)}"
 
     def answer_question_stream(
         self,
@@ -225,9 +339,9 @@ class RAGService:
         - ("error", {"detail": "..."})
         """
         # Check cache first
-        cache = get_query_cache()
+        semantic_entry = None
         if use_retrieval and app_config.QUERY_CACHE_ENABLED:
-            cached = cache.get(question)
+            cached, semantic_entry = self._get_cached_answer(question, top_k, history)
             if cached is not None:
                 logger.info("Returning cached answer via stream")
                 yield ("sources", {"sources": cached.get("sources", [])})
@@ -254,7 +368,8 @@ class RAGService:
             try:
                 retrieval_results = self.retriever.retrieve(
                     query=question,
-                    top_k=top_k
+                    top_k=top_k,
+                    query_embedding=semantic_entry[1] if semantic_entry else None,
                 )
                 context = self.retriever.format_context(retrieval_results)
                 sources = self._extract_sources(retrieval_results)
@@ -275,7 +390,7 @@ class RAGService:
                 "fused_count": len(retrieval_results.get("fused_results", [])),
                 "reranked": retrieval_results.get("reranked", False),
                 "cached": False,
-                "weights": self.retriever._compute_weights(question),
+                "weights": retrieval_results.get("weights", {}),
             })
 
         # Step 3: Build prompt
@@ -285,6 +400,7 @@ class RAGService:
         client = openai.OpenAI(
             base_url=self.llm_base_url,
             api_key=self.llm_api_key,
+            http_client=_get_http_client(),
         )
 
         # Track whether we're inside <think> tags (fallback for APIs
@@ -355,12 +471,12 @@ class RAGService:
             if use_retrieval and app_config.QUERY_CACHE_ENABLED:
                 full_answer = "".join(full_answer_parts)
                 if full_answer:
-                    cache.put(question, {
+                    self._cache_answer(question, {
                         "answer": full_answer,
                         "sources": sources,
                         "context_used": bool(context),
                         "model": self.llm_model,
-                    })
+                    }, semantic_entry)
 
         except Exception as e:
             logger.error(f"Streaming generation failed: {e}")
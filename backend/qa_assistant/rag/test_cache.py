@@ -0,0 +1,185 @@
+import math
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from rag import semantic_cache
+from rag.cache import EmbeddingCache, QueryCache, ScorerCache
+from rag.semantic_cache import SemanticCache
+
+
+class QueryCacheTests(unittest.TestCase):
+    def test_get_normalizes_query(self):
+        cache = QueryCache(max_size=4)
+        cache.put("  DU01-01 容积率 ", {"answer": "a"})
+
+        self.assertEqual(cache.get("du01-01 容积率"), {"answer": "a"})
+        self.assertIsNone(cache.get("DU01-02 容积率"))
+        self.assertEqual(cache.get_stats()["hits"], 1)
+        self.assertEqual(cache.get_stats()["misses"], 1)
+
+    def test_put_overwrites_existing_entry(self):
+        cache = QueryCache(max_size=2)
+        cache.put("q", {"answer": "old"})
+        cache.put("q", {"answer": "new"})
+
+        self.assertEqual(cache.get("q"), {"answer": "new"})
+        self.assertEqual(cache.get_stats()["size"], 1)
+
+    def test_referenced_entry_survives_eviction(self):
+        cache = QueryCache(max_size=2)
+        cache.put("a", {"answer": "a"})
+        cache.put("b", {"answer": "b"})
+        cache.get("a")
+
+        cache.put("c", {"answer": "c"})
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_full_cache_rejects_unadmitted_keys(self):
+        cache = QueryCache(max_size=1, admission_probability=0.0)
+        cache.put("a", {"answer": "a"})
+        cache.put("b", {"answer": "b"})
+        cache.put("a", {"answer": "a2"})
+
+        self.assertEqual(cache.get("a"), {"answer": "a2"})
+        self.assertIsNone(cache.get("b"))
+
+    def test_expired_entry_is_dropped(self):
+        cache = QueryCache(max_size=2, ttl_seconds=10)
+        with mock.patch("rag.cache.time.time", return_value=1000.0):
+            cache.put("q", {"answer": "a"})
+        with mock.patch("rag.cache.time.time", return_value=1011.0):
+            self.assertIsNone(cache.get("q"))
+
+        self.assertEqual(cache.get_stats()["size"], 0)
+
+    def test_zero_size_disables_cache(self):
+        cache = QueryCache(max_size=0)
+        cache.put("q", {"answer": "a"})
+        cache.invalidate_all()
+        cache.put("q", {"answer": "a"})
+
+        self.assertIsNone(cache.get("q"))
+        self.assertEqual(cache.get_stats()["size"], 0)
+
+    def test_invalidate_all(self):
+        cache = QueryCache(max_size=2)
+        cache.put("q", {"answer": "a"})
+        cache.invalidate_all()
+
+        self.assertIsNone(cache.get("q"))
+        self.assertEqual(cache.get_stats()["size"], 0)
+
+
+def _at_cosine(cos: float) -> list:
+    """2-d vector whose cosine similarity with [1, 0] is *cos*."""
+    return [cos, math.sqrt(1.0 - cos * cos)]
+
+
+class SemanticCacheTests(unittest.TestCase):
+    def test_hit_above_threshold_and_miss_below(self):
+        cache = SemanticCache(max_size=4, threshold=0.9)
+        cache.put([2.0, 0.0], "t", {"answer": "a"})
+
+        self.assertEqual(cache.get(_at_cosine(0.91), "t"), {"answer": "a"})
+        self.assertIsNone(cache.get(_at_cosine(0.89), "t"))
+
+    def test_different_tag_misses(self):
+        cache = SemanticCache(max_size=4, threshold=0.9)
+        cache.put([1.0, 0.0], ("DU01-01",), {"answer": "a"})
+
+        self.assertIsNone(cache.get([1.0, 0.0], ("DU01-02",)))
+        self.assertEqual(cache.get([1.0, 0.0], ("DU01-01",)), {"answer": "a"})
+
+    def test_expired_entry_misses(self):
+        cache = SemanticCache(max_size=4, ttl_seconds=10, threshold=0.9)
+        with mock.patch("rag.semantic_cache.time.time", return_value=1000.0):
+            cache.put([1.0, 0.0], "t", {"answer": "a"})
+        with mock.patch("rag.semantic_cache.time.time", return_value=1005.0):
+            self.assertIsNotNone(cache.get([1.0, 0.0], "t"))
+        with mock.patch("rag.semantic_cache.time.time", return_value=1011.0):
+            self.assertIsNone(cache.get([1.0, 0.0], "t"))
+
+    def test_ring_overwrites_oldest_entry(self):
+        cache = SemanticCache(max_size=2, threshold=0.9)
+        cache.put([1.0, 0.0, 0.0], "t", {"answer": "a"})
+        cache.put([0.0, 1.0, 0.0], "t", {"answer": "b"})
+        cache.put([0.0, 0.0, 1.0], "t", {"answer": "c"})
+
+        self.assertIsNone(cache.get([1.0, 0.0, 0.0], "t"))
+        self.assertEqual(cache.get([0.0, 1.0, 0.0], "t"), {"answer": "b"})
+        self.assertEqual(cache.get([0.0, 0.0, 1.0], "t"), {"answer": "c"})
+        self.assertEqual(cache.get_stats()["size"], 2)
+
+    def test_dimension_change_resets_entries(self):
+        cache = SemanticCache(max_size=4, threshold=0.9)
+        cache.put([1.0, 0.0, 0.0], "t", {"answer": "a"})
+        cache.put([1.0, 0.0], "t", {"answer": "b"})
+
+        self.assertIsNone(cache.get([1.0, 0.0, 0.0], "t"))
+        self.assertEqual(cache.get([1.0, 0.0], "t"), {"answer": "b"})
+        self.assertEqual(cache.get_stats()["size"], 1)
+
+    def test_zero_threshold_disables_caches(self):
+        with mock.patch("core.config.SEMANTIC_CACHE_THRESHOLD", 0.0), \
+                mock.patch.object(semantic_cache, "_semantic_cache", None), \
+                mock.patch.object(semantic_cache, "_semantic_answer_cache", None):
+            self.assertIsNone(semantic_cache.get_semantic_cache())
+            self.assertIsNone(semantic_cache.get_semantic_answer_cache())
+
+
+class ScorerCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "scores.sqlite3")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_get_many_returns_cached_scores_by_index(self):
+        cache = ScorerCache(self.path)
+        cache.put_many("m\nq", [("p1", 0.9), ("p2", 0.1)])
+
+        self.assertEqual(cache.get_many("m\nq", ["p2", "p3", "p1", "p2"]), {0: 0.1, 2: 0.9, 3: 0.1})
+        self.assertEqual(cache.get_many("m\nother", ["p1"]), {})
+        cache.close()
+
+    def test_scores_persist_and_expire(self):
+        with mock.patch("rag.cache.time.time", return_value=1000.0):
+            cache = ScorerCache(self.path, ttl_seconds=10)
+            cache.put_many("q", [("p", 0.5)])
+            cache.close()
+
+        with mock.patch("rag.cache.time.time", return_value=1005.0):
+            reopened = ScorerCache(self.path, ttl_seconds=10)
+            self.assertEqual(reopened.get_many("q", ["p"]), {0: 0.5})
+        with mock.patch("rag.cache.time.time", return_value=1011.0):
+            self.assertEqual(reopened.get_many("q", ["p"]), {})
+        reopened.close()
+
+
+class EmbeddingCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "embeddings.sqlite3")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_vectors_are_shared_across_instances_per_model(self):
+        writer = EmbeddingCache(self.path)
+        writer.put("m1", "q", b"\x00\x00\x80\x3f")
+        reader = EmbeddingCache(self.path)
+
+        self.assertEqual(reader.get("m1", "q"), b"\x00\x00\x80\x3f")
+        self.assertIsNone(reader.get("m2", "q"))
+        writer.close()
+        reader.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
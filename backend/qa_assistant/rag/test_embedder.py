@@ -0,0 +1,51 @@
+import sqlite3
+import unittest
+from unittest import mock
+
+from rag.embedder import EmbeddingService
+
+
+def _fake_response(inputs, timeout):
+    # Embedding encodes the input so rows can be traced back to their text
+    return {"data": [{"index": i, "embedding": [float(ord(text[0])), float(len(text))]}
+                     for i, text in enumerate(inputs)]}
+
+
+class EmbedBatchTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.service = EmbeddingService("http://embed", "key", "model")
+        self.addCleanup(self.service.close)
+        self.service._post_embeddings = mock.Mock(side_effect=_fake_response)
+
+    def test_duplicates_are_requested_once_and_keep_input_order(self):
+        texts = ["a", "bb", "a", "ccc", "bb"]
+
+        vectors = self.service.embed_batch(texts)
+
+        self.service._post_embeddings.assert_called_once_with(["a", "bb", "ccc"], timeout=60)
+        self.assertEqual(len(vectors), len(texts))
+        self.assertEqual(
+            [tuple(v) for v in vectors],
+            [(ord(t[0]), len(t)) for t in texts],
+        )
+        self.assertTrue((vectors[0] == vectors[2]).all())
+        self.assertTrue((vectors[1] == vectors[4]).all())
+
+
+class EmbedTextDiskCacheTests(unittest.TestCase):
+    def test_disk_cache_errors_still_return_the_embedding(self):
+        disk_cache = mock.Mock()
+        disk_cache.get.side_effect = sqlite3.OperationalError("database is locked")
+        disk_cache.put.side_effect = sqlite3.OperationalError("disk I/O error")
+        service = EmbeddingService("http://embed", "key", "model", disk_cache=disk_cache)
+        self.addCleanup(service.close)
+        service._post_embeddings = mock.Mock(side_effect=lambda text, timeout: _fake_response([text], timeout))
+
+        vector = service.embed_text("abc")
+
+        self.assertEqual(tuple(vector), (ord("a"), 3))
+        disk_cache.put.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
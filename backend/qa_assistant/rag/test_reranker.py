@@ -0,0 +1,78 @@
+import sqlite3
+import unittest
+from unittest import mock
+
+from rag.cache import QueryCache
+from rag.reranker import Reranker
+
+
+class RerankCacheTests(unittest.TestCase):
+    def test_case_distinct_passages_do_not_share_cached_order(self):
+        reranker = Reranker(base_url="http://rerank", api_key="key", model="m", top_n=2)
+        reranker._call_api = mock.Mock(side_effect=[[(0, 0.9), (1, 0.1)], [(1, 0.8), (0, 0.2)]])
+        with mock.patch("rag.reranker.get_rerank_cache", return_value=QueryCache(max_size=8)), \
+                mock.patch("rag.reranker.get_scorer_cache", return_value=None):
+            first = reranker.rerank("q", [{"text": "Alpha"}, {"text": "beta"}])
+            second = reranker.rerank("q", [{"text": "alpha"}, {"text": "Beta"}])
+
+        self.assertEqual(reranker._call_api.call_count, 2)
+        self.assertEqual([d["text"] for d in first], ["Alpha", "beta"])
+        self.assertEqual([d["text"] for d in second], ["Beta", "alpha"])
+
+
+class RerankShortcutTests(unittest.TestCase):
+    def test_single_document_is_returned_without_a_score(self):
+        reranker = Reranker(base_url="http://rerank", api_key="key", model="m")
+        reranker._call_api = mock.Mock()
+
+        reranked = reranker.rerank("q", [{"text": "only", "weighted_score": 0.4}])
+
+        reranker._call_api.assert_not_called()
+        self.assertEqual(reranked, [{"text": "only", "weighted_score": 0.4}])
+
+
+class RankPassagesTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.reranker = Reranker(base_url="http://rerank", api_key="key", model="m")
+        # Scores for the unique passages ["a", "b", "c"], best first
+        self.reranker._score_passages = mock.Mock(return_value=[(2, 0.9), (0, 0.5), (1, 0.1)])
+
+    def test_duplicates_are_scored_once_and_fanned_out(self):
+        ranked = self.reranker._rank_passages("q", ["a", "b", "a", "c", "b"], 5)
+
+        self.reranker._score_passages.assert_called_once_with("q", ["a", "b", "c"], 3)
+        self.assertEqual(ranked, [(3, 0.9), (0, 0.5), (2, 0.5), (1, 0.1), (4, 0.1)])
+
+    def test_top_n_applies_after_fan_out(self):
+        ranked = self.reranker._rank_passages("q", ["a", "b", "a", "c", "b"], 2)
+
+        self.assertEqual(ranked, [(3, 0.9), (0, 0.5)])
+
+    def test_api_top_n_never_exceeds_unique_passages(self):
+        reranker = Reranker(base_url="http://rerank", api_key="key", model="m")
+        reranker._call_api = mock.Mock(return_value=[(1, 0.9), (0, 0.2)])
+        documents = [{"text": "a"}, {"text": "b"}, {"text": "a"}]
+        with mock.patch("rag.reranker.get_rerank_cache", return_value=QueryCache(max_size=8)), \
+                mock.patch("rag.reranker.get_scorer_cache", return_value=None):
+            reranked = reranker.rerank("q", documents, top_n=len(documents))
+
+        reranker._call_api.assert_called_once_with("q", ["a", "b"], 2)
+        self.assertEqual([d["text"] for d in reranked], ["b", "a", "a"])
+
+
+class ScorePassagesTests(unittest.TestCase):
+    def test_score_cache_errors_do_not_discard_fresh_scores(self):
+        reranker = Reranker(base_url="http://rerank", api_key="key", model="m")
+        reranker._call_api = mock.Mock(return_value=[(1, 0.9), (0, 0.2)])
+        score_cache = mock.Mock()
+        score_cache.get_many.side_effect = sqlite3.OperationalError("database is locked")
+        score_cache.put_many.side_effect = sqlite3.OperationalError("database is locked")
+        with mock.patch("rag.reranker.get_scorer_cache", return_value=score_cache):
+            ranked = reranker._score_passages("q", ["a", "b"], 2)
+
+        reranker._call_api.assert_called_once_with("q", ["a", "b"], 2)
+        self.assertEqual(ranked, [(1, 0.9), (0, 0.2)])
+
+
+if __name__ == "__main__":
+    unittest.main()
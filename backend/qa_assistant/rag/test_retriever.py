@@ -0,0 +1,182 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from rag import retriever as retriever_module
+from rag.retriever import MultiSourceRetriever
+from rag.semantic_cache import SemanticCache
+
+EQUAL_WEIGHTS = {"vector": 0.5, "graph": 0.5, "keyword": 0.5}
+
+
+class FuseResultsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.retriever = MultiSourceRetriever(None, None, None, None, reranker=None)
+
+    def fuse(self, vector=(), graph=(), keyword=(), top_k=10, weights=EQUAL_WEIGHTS):
+        return self.retriever._fuse_results(list(vector), list(graph), list(keyword), top_k, weights=weights)
+
+    def test_empty_sources_return_nothing(self):
+        self.assertEqual(self.fuse(), [])
+
+    def test_ties_keep_source_then_input_order(self):
+        fused = self.fuse(
+            vector=[{"id": "v1", "score": 0.7}, {"id": "v2", "score": 0.7}],
+            graph=[{"type": "plot_info", "plot_name": "DU01-01", "score": 0.9}],
+            keyword=[{"_id": "k1", "score": 3.0}],
+        )
+
+        self.assertEqual(
+            [r.get("id") or r.get("_id") or r["plot_name"] for r in fused],
+            ["v1", "v2", "DU01-01", "k1"],
+        )
+        self.assertTrue(all(r["weighted_score"] == 0.5 for r in fused))
+
+    def test_milvus_id_and_mongo_id_collapse_to_one_result(self):
+        fused = self.fuse(
+            vector=[{"id": "c1", "text": "chunk", "score": 0.9}],
+            keyword=[{"_id": "c1", "text": "chunk", "score": 2.0}, {"_id": "c2", "text": "other", "score": 1.0}],
+            weights={"vector": 0.6, "graph": 0.2, "keyword": 0.2},
+        )
+
+        self.assertEqual([r.get("id") or r.get("_id") for r in fused], ["c1", "c2"])
+        # The higher-weighted vector copy is the one kept
+        self.assertIn("id", fused[0])
+
+    def test_graph_results_dedup_by_type_plot_and_indicator(self):
+        fused = self.fuse(graph=[
+            {"type": "plot_info", "plot_name": "DU01-01", "score": 0.9},
+            {"type": "plot_info", "plot_name": "DU01-01", "score": 0.9},
+            {"type": "indicator_search", "indicator": "容积率", "score": 0.8},
+            {"type": "indicator_search", "indicator": "绿地率", "score": 0.8},
+        ])
+
+        self.assertEqual(
+            [(r["type"], r.get("plot_name"), r.get("indicator")) for r in fused],
+            [
+                ("plot_info", "DU01-01", None),
+                ("indicator_search", None, "容积率"),
+                ("indicator_search", None, "绿地率"),
+            ],
+        )
+
+    def test_top_k_keeps_highest_weighted_results(self):
+        fused = self.fuse(
+            vector=[{"id": "v1", "score": 0.2}, {"id": "v2", "score": 0.9}, {"id": "v3", "score": 0.5}],
+            top_k=2,
+        )
+
+        self.assertEqual([r["id"] for r in fused], ["v2", "v3"])
+        self.assertAlmostEqual(fused[0]["weighted_score"], 0.5)
+        self.assertAlmostEqual(fused[1]["weighted_score"], 0.5 * (0.5 - 0.2) / (0.9 - 0.2))
+
+
+class RetrieveConcurrencyTests(unittest.TestCase):
+    WORKERS = 2
+
+    def setUp(self) -> None:
+        pool = ThreadPoolExecutor(max_workers=self.WORKERS, thread_name_prefix="retriever")
+        self.addCleanup(pool.shutdown)
+        patches = [
+            mock.patch.object(retriever_module, "_SEARCH_POOL", pool),
+            mock.patch.object(retriever_module, "_SEARCH_SLOTS", threading.BoundedSemaphore(self.WORKERS)),
+            mock.patch.object(retriever_module, "get_semantic_cache", return_value=None),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.lock = threading.Lock()
+        self.running_on_pool = 0
+        self.max_running_on_pool = 0
+        self.retriever = MultiSourceRetriever(None, None, None, None, reranker=None)
+        self.retriever._vector_search = self._search("v")
+        self.retriever._graph_search = self._search("g")
+        self.retriever._keyword_search = self._search("k")
+
+    def _search(self, prefix):
+        def search(query, *args):
+            on_pool = threading.current_thread().name.startswith("retriever")
+            with self.lock:
+                self.running_on_pool += on_pool
+                self.max_running_on_pool = max(self.max_running_on_pool, self.running_on_pool)
+            time.sleep(0.02)
+            with self.lock:
+                self.running_on_pool -= on_pool
+            return [{"id": f"{prefix}-{query}", "text": query, "score": 1.0}]
+        return search
+
+    def test_more_concurrent_requests_than_workers_all_complete(self):
+        queries = [f"DU01-0{i} 容积率" for i in range(1, 7)]
+        with ThreadPoolExecutor(max_workers=len(queries)) as requests:
+            results = list(requests.map(lambda q: self.retriever.retrieve(q, top_k=5), queries))
+
+        for query, result in zip(queries, results):
+            self.assertEqual(
+                sorted(r["id"] for r in result["fused_results"]),
+                [f"g-{query}", f"k-{query}", f"v-{query}"],
+            )
+        self.assertLessEqual(self.max_running_on_pool, self.WORKERS)
+
+
+class _Embedder:
+    def embed_text(self, text):
+        return [1.0, 0.0]
+
+
+class _Milvus:
+    def search(self, collection_name, query_vector, top_k):
+        return [{"id": "v1", "text": "chunk", "distance": 0.1}]
+
+
+class SemanticCacheCompletenessTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.semantic_cache = SemanticCache(max_size=8, threshold=0.9)
+        patcher = mock.patch.object(retriever_module, "get_semantic_cache", return_value=self.semantic_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mongodb = mock.Mock()
+        self.mongodb.text_search.return_value = [{"_id": "k1", "text": "other", "score": 2.0}]
+        self.retriever = MultiSourceRetriever(_Milvus(), self.mongodb, None, _Embedder(), reranker=None)
+
+    def test_complete_result_is_cached(self):
+        self.retriever.retrieve("建设规定", top_k=5)
+
+        self.assertEqual(self.semantic_cache.get_stats()["size"], 1)
+
+    def test_failed_keyword_search_is_not_cached(self):
+        self.mongodb.text_search.side_effect = RuntimeError("mongo down")
+
+        results = self.retriever.retrieve("建设规定", top_k=5)
+
+        self.assertEqual(results["keyword_results"], [])
+        self.assertEqual([r["id"] for r in results["fused_results"]], ["v1"])
+        self.assertEqual(self.semantic_cache.get_stats()["size"], 0)
+
+    def test_failed_rerank_is_not_cached(self):
+        reranker = mock.Mock()
+        reranker.rerank.side_effect = RuntimeError("rerank API down")
+        self.retriever.reranker = reranker
+
+        results = self.retriever.retrieve("建设规定", top_k=5)
+
+        self.assertFalse(results["reranked"])
+        self.assertEqual(self.semantic_cache.get_stats()["size"], 0)
+
+    def test_keyword_search_overlaps_query_embedding(self):
+        keyword_started = threading.Event()
+        self.mongodb.text_search.side_effect = lambda *args, **kwargs: keyword_started.set() or []
+        embedder = mock.Mock()
+        embedder.embed_text.side_effect = lambda text: [1.0, 0.0] if keyword_started.wait(1) else [0.0, 1.0]
+        self.retriever.embedder = embedder
+
+        self.retriever.retrieve("建设规定", top_k=5)
+
+        # The embedding only comes back as [1.0, 0.0] once keyword search is running
+        self.assertIsNotNone(self.semantic_cache.get([1.0, 0.0], ((), (), 5, True, True, True)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from unittest import mock
+
+from rag.cache import QueryCache
+from rag.semantic_cache import SemanticCache
+from rag.service import RAGService
+
+
+class _Embedder:
+    def __init__(self):
+        self.calls = 0
+
+    def embed_text(self, text):
+        self.calls += 1
+        return [1.0, 0.0] if "容积率" in text else [0.0, 1.0]
+
+
+class _Retriever:
+    def __init__(self):
+        self.embedder = _Embedder()
+        self.query_embeddings = []
+
+    def retrieve(self, query, top_k, query_embedding=None):
+        self.query_embeddings.append(query_embedding)
+        return {"vector_results": [], "graph_results": [], "keyword_results": [], "fused_results": []}
+
+    def format_context(self, results):
+        return ""
+
+
+class SemanticAnswerCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.semantic_cache = SemanticCache(max_size=8, threshold=0.9)
+        patches = [
+            mock.patch("rag.service.get_query_cache", return_value=QueryCache(max_size=8)),
+            mock.patch("rag.service.get_semantic_answer_cache", return_value=self.semantic_cache),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.retriever = _Retriever()
+        self.service = RAGService(self.retriever, "http://llm", "key", "model")
+        self.service._generate_answer = mock.Mock(side_effect=["first", "second", "third"])
+
+    def test_paraphrase_reuses_answer_for_same_top_k(self):
+        self.service.answer_question("DU01-01 容积率是多少", top_k=5)
+
+        self.assertEqual(self.service.answer_question("DU01-01 容积率多少", top_k=5)["answer"], "first")
+        self.assertEqual(self.service.answer_question("DU01-01 容积率多少", top_k=10)["answer"], "second")
+        self.assertEqual(self.service.answer_question("DU01-02 容积率多少", top_k=5)["answer"], "third")
+
+    def test_questions_with_history_skip_semantic_cache(self):
+        history = [{"role": "user", "content": "上一个问题"}]
+        self.service.answer_question("DU01-01 容积率是多少", history=history, top_k=5)
+
+        self.assertEqual(self.semantic_cache.get_stats()["size"], 0)
+        answer = self.service.answer_question("DU01-01 容积率多少", top_k=5)["answer"]
+        self.assertEqual(answer, "second")
+
+    def test_uncached_answer_embeds_question_once(self):
+        self.service.answer_question("DU01-01 容积率是多少", top_k=5)
+
+        self.assertEqual(self.retriever.embedder.calls, 1)
+        self.assertEqual(self.retriever.query_embeddings, [[1.0, 0.0]])
+        self.assertEqual(self.semantic_cache.get_stats()["size"], 1)
+
+    def test_failed_generation_is_not_cached(self):
+        self.service._generate_answer = mock.Mock(side_effect=["抱歉，生成答案时出错：timeout", "first"])
+
+        self.service.answer_question("DU01-01 容积率是多少", top_k=5)
+
+        self.assertEqual(self.semantic_cache.get_stats()["size"], 0)
+        self.assertEqual(self.service.answer_question("DU01-01 容积率是多少", top_k=5)["answer"], "first")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import json
 import re
 import time
 import logging
 
+import orjson
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from typing import List
@@ -105,10 +105,10 @@ def chat_stream(request: ChatRequest):
                     use_retrieval=request.use_retrieval,
                     top_k=request.top_k,
                 ):
-                    yield f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+                    yield f"event: {event_type}\ndata: {orjson.dumps(data).decode()}\n\n"
             except Exception as e:
                 logger.error(f"QA stream error: {e}")
-                error_data = json.dumps({"detail": str(e)}, ensure_ascii=False)
+                error_data = orjson.dumps({"detail": str(e)}).decode()
                 yield f"event: error\ndata: {error_data}\n\n"
 
         return StreamingResponse(
@@ -16,6 +16,11 @@ class DocumentChunker:
     _TABLE_SEPARATOR_RE = re.compile(
         r"^\s*\|?\s*:?[-]{3,}\s*:?(\s*\|\s*:?[-]{3,}\s*:?\s*)+\|?\s*$"
     )
+    _HEADER_RE = re.compile(r"^#{1,3}\s+")
+    _CJK_RE = re.compile(r"[\u4e00-\u9fff]")
+    _WHITESPACE_RE = re.compile(r"\s")
+    # Image destination followed by an optional quoted title
+    _IMAGE_TITLE_RE = re.compile(r"^(.*?)(?:\s+[\"'][^\"']*[\"'])\s*$")
 
     def __init__(self, chunk_size: int = 800, overlap: int = 100):
         """
@@ -113,7 +118,7 @@ class DocumentChunker:
 
         for line in lines:
             # Match headers (# ## ###)
-            if re.match(r"^#{1,3}\s+", line):
+            if self._HEADER_RE.match(line):
                 # Save previous section
                 if current_section["content"].strip():
                     sections.append(current_section)
@@ -335,10 +340,10 @@ class DocumentChunker:
     def _is_mostly_cjk(self, text: str) -> bool:
         if not text:
             return False
-        cjk = len(re.findall(r"[\u4e00-\u9fff]", text))
+        cjk = len(self._CJK_RE.findall(text))
         if cjk == 0:
             return False
-        whitespace = len(re.findall(r"\s", text))
+        whitespace = len(self._WHITESPACE_RE.findall(text))
         ratio_cjk = cjk / max(len(text), 1)
         ratio_ws = whitespace / max(len(text), 1)
         return ratio_cjk >= 0.2 and ratio_ws < 0.2
@@ -354,19 +359,13 @@ class DocumentChunker:
         """
         Extract image references from markdown.
         """
-        refs: List[str] = []
+        # Stripped refs in first-seen order; dict keys drop repeats in the same pass
+        refs: Dict[str, None] = {}
         for raw_ref in self._iter_image_refs(markdown):
             ref = self._strip_image_ref(raw_ref)
             if ref:
-                refs.append(ref)
-        seen = set()
-        ordered: List[str] = []
-        for ref in refs:
-            if ref in seen:
-                continue
-            seen.add(ref)
-            ordered.append(ref)
-        return ordered
+                refs[ref] = None
+        return list(refs)
 
     def _iter_image_refs(self, markdown: str):
         idx = 0
@@ -403,41 +402,48 @@ class DocumentChunker:
         if start >= len(text) or text[start] != opener:
             return -1
 
+        # Jump between the only characters that matter (opener, closer,
+        # backslash escape) with str.find instead of stepping char by char
+        length = len(text)
         depth = 1
         i = start + 1
-        while i < len(text):
-            ch = text[i]
-            if ch == "\\":
-                i += 2
-                continue
-            if ch == opener:
+        next_open = text.find(opener, i)
+        next_close = text.find(closer, i)
+        next_escape = text.find("\\", i)
+        while True:
+            pos = min(
+                p if p != -1 else length
+                for p in (next_open, next_close, next_escape)
+            )
+            if pos >= length:
+                return -1
+            if pos == next_escape:
+                # Skip the escaped character, whatever it is
+                i = pos + 2
+            elif pos == next_open:
                 depth += 1
-            elif ch == closer:
+                i = pos + 1
+            else:
                 depth -= 1
                 if depth == 0:
-                    return i
-            i += 1
-        return -1
+                    return pos
+                i = pos + 1
+            # Refresh only the positions that were passed
+            if next_open != -1 and next_open < i:
+                next_open = text.find(opener, i)
+            if next_close != -1 and next_close < i:
+                next_close = text.find(closer, i)
+            if next_escape != -1 and next_escape < i:
+                next_escape = text.find("\\", i)
 
     def _extract_parenthesized(self, text: str, start: int):
         if start >= len(text) or text[start] != "(":
             return None, start
 
-        depth = 1
-        i = start + 1
-        while i < len(text):
-            ch = text[i]
-            if ch == "\\":
-                i += 2
-                continue
-            if ch == "(":
-                depth += 1
-            elif ch == ")":
-                depth -= 1
-                if depth == 0:
-                    return text[start + 1:i], i + 1
-            i += 1
-        return None, start + 1
+        end = self._find_matching_bracket(text, start, "(", ")")
+        if end == -1:
+            return None, start + 1
+        return text[start + 1:end], end + 1
 
     def normalize_image_ref(self, ref: str) -> str:
         """
@@ -465,7 +471,7 @@ class DocumentChunker:
                 cleaned = cleaned[1:]
         else:
             # Preserve spaces in file names and only strip an optional quoted title.
-            title_match = re.match(r"^(.*?)(?:\s+[\"'][^\"']*[\"'])\s*$", cleaned)
+            title_match = self._IMAGE_TITLE_RE.match(cleaned)
             if title_match:
                 cleaned = title_match.group(1)
 
@@ -2,6 +2,7 @@
 Embedding service for generating vector embeddings.
 """
 
+import gzip
 import json
 from json import JSONDecodeError
 import urllib.request
@@ -15,6 +16,14 @@ from ...core import config
 logger = logging.getLogger(__name__)
 
 
+def _read_body(resp) -> str:
+    """Read an HTTP response (or HTTPError) body as text, gunzipping it if needed."""
+    body_bytes = resp.read()
+    if (resp.headers.get("Content-Encoding") or "").lower() == "gzip":
+        body_bytes = gzip.decompress(body_bytes)
+    return body_bytes.decode("utf-8", errors="replace")
+
+
 class EmbeddingService:
     """Service for generating text embeddings using OpenAI-compatible API."""
 
@@ -52,14 +61,15 @@ class EmbeddingService:
             data = json.dumps(payload).encode("utf-8")
             headers = {
                 "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}"
+                "Authorization": f"Bearer {self.api_key}",
+                # Batch responses are large JSON float arrays and compress well
+                "Accept-Encoding": "gzip",
             }
             req = urllib.request.Request(endpoint, data=data, headers=headers, method="POST")
 
             try:
                 with urllib.request.urlopen(req, timeout=timeout) as response:
-                    body_bytes = response.read()
-                    body = body_bytes.decode("utf-8", errors="replace")
+                    body = _read_body(response)
                     content_type = (response.headers.get("Content-Type") or "").lower()
 
                 try:
@@ -80,7 +90,7 @@ class EmbeddingService:
 
             except urllib.error.HTTPError as exc:
                 try:
-                    body = exc.read().decode("utf-8", errors="replace")
+                    body = _read_body(exc)
                 except Exception:
                     body = ""
                 preview = body.strip().replace("\n", " ")[:200]
@@ -49,6 +49,24 @@ next plain line
         self.assertLessEqual(len(chunks), 20)
         self.assertTrue(all(len(chunk.split()) <= 5 for chunk in chunks))
 
+    def test_find_matching_bracket_handles_nesting_escapes_and_bounds(self):
+        chunker = DocumentChunker()
+
+        self.assertEqual(chunker._find_matching_bracket("[a[b]c]", 0, "[", "]"), 6)
+        self.assertEqual(chunker._find_matching_bracket("[a[b]c", 0, "[", "]"), -1)
+        self.assertEqual(chunker._find_matching_bracket("[a\\]b]", 0, "[", "]"), 5)
+        self.assertEqual(chunker._find_matching_bracket("x[ab]", 1, "[", "]"), 4)
+        self.assertEqual(chunker._find_matching_bracket("[ab]", 1, "[", "]"), -1)
+        self.assertEqual(chunker._find_matching_bracket("[", 1, "[", "]"), -1)
+
+    def test_image_refs_with_nested_and_escaped_brackets(self):
+        chunker = DocumentChunker()
+        markdown = "![a [b] \\] c](img/one.png) text ![unclosed(img/two.png) ![d](img/(three).png)"
+
+        self.assertEqual(chunker.extract_image_refs(markdown), ["img/one.png", "img/(three).png"])
+        self.assertEqual(chunker._extract_parenthesized("(a\\)b)", 0), ("a\\)b", 6))
+        self.assertEqual(chunker._extract_parenthesized("(a(b)", 0), (None, 1))
+
 
 if __name__ == "__main__":
     unittest.main()